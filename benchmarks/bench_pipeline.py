@@ -0,0 +1,141 @@
+"""Benchmark Phase 1, Phase 3 and apply on synthetic catalogs.
+
+Usage:
+    uv run python -m benchmarks.bench_pipeline [--sizes 1000 10000 100000]
+        [--jobs N] [--io-threads N] [--output PATH]
+
+For each size a fresh catalog is generated in a temporary directory (see
+`benchmarks.catalog`), then timed:
+
+- phase1: building the `ComponentRegistry` from every catalog folder,
+- phase3: transforming every template (`transform_files`),
+- apply: the journaled apply the tool runs, writing every `.jx`, removing
+  every `.jinja` and copying the assets, on `--io-threads` threads.
+
+Results are printed and saved as JSON (with the current commit, if any) so
+runs on different commits can be compared.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.catalog import generate_catalog
+from migrate import (
+    DEFAULT_IO_THREADS,
+    JOURNAL_NAME,
+    ComponentRegistry,
+    Journal,
+    plan_asset_copies,
+    transform_files,
+)
+
+SIZES = (1_000, 10_000, 100_000)
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def current_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def bench(
+    files: int,
+    jobs: int,
+    prefixes: int = 3,
+    seed: int = 0,
+    io_threads: int = DEFAULT_IO_THREADS,
+) -> dict:
+    with tempfile.TemporaryDirectory(prefix="jx-bench-") as tmp:
+        folders = generate_catalog(Path(tmp), files, prefixes=prefixes, seed=seed)
+
+        start = time.perf_counter()
+        registry = ComponentRegistry()
+        for folder in folders:
+            registry.add_folder(folder)
+        phase1 = time.perf_counter() - start
+
+        start = time.perf_counter()
+        changes = list(
+            transform_files(registry.templates, registry, "/static/", jobs)
+        )
+        phase3 = time.perf_counter() - start
+
+        copies = plan_asset_copies(registry, Path(tmp) / "static", "/static/")
+        start = time.perf_counter()
+        journal = Journal.start(Path(tmp) / JOURNAL_NAME)
+        try:
+            journal.apply_templates(changes, io_threads)
+            journal.copy_assets(copies, io_threads)
+            journal.commit()
+        finally:
+            journal.close()
+        apply = time.perf_counter() - start
+
+    return {
+        "files": files,
+        "prefixes": prefixes,
+        "seed": seed,
+        "jobs": jobs,
+        "io_threads": io_threads,
+        "changed": sum(1 for c in changes if c.changed),
+        "assets": len(copies),
+        "phase1": round(phase1, 6),
+        "phase3": round(phase3, 6),
+        "apply": round(apply, 6),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--io-threads", type=int, default=DEFAULT_IO_THREADS)
+    parser.add_argument("--prefixes", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="JSON file for the results (default: benchmarks/results/<time>.json)",
+    )
+    args = parser.parse_args()
+
+    runs = []
+    print(f"{'files':>8}  {'phase1':>9}  {'phase3':>9}  {'apply':>9}")
+    for files in args.sizes:
+        run = bench(files, args.jobs, args.prefixes, args.seed, args.io_threads)
+        runs.append(run)
+        print(
+            f"{files:>8}  {run['phase1']:>9.3f}  {run['phase3']:>9.3f}  "
+            f"{run['apply']:>9.3f}"
+        )
+
+    now = datetime.now()
+    output = args.output or RESULTS_DIR / f"{now:%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "commit": current_commit(),
+        "date": now.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "runs": runs,
+    }, indent=2) + "\n", encoding="utf-8")
+    print(f"\nSaved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark `find_slot_blocks` on large slot-heavy layouts.
+
+Usage:
+    uv run python -m benchmarks.bench_slots
+
+Times the parser on templates of increasing size up to 50k lines. With a
+single pass over the tags, time per line should stay roughly flat.
+"""
+
+from __future__ import annotations
+
+import time
+
+from migrate import find_slot_blocks
+
+CHUNK = (
+    '{% if _slot == "header" %}\n'
+    "  {% if user %}<b>{{ user.name }}</b>{% endif %}\n"
+    '{% elif _slot == "footer" %}\n'
+    "  <p>Footer</p>\n"
+    "{% else %}\n"
+    "  {% if show %}Body{% endif %}\n"
+    "{% endif %}\n"
+    "<div>{{ value }}</div>\n"
+)
+CHUNK_LINES = CHUNK.count("\n")
+
+
+def make_template(lines: int) -> str:
+    return CHUNK * (lines // CHUNK_LINES)
+
+
+def bench(lines: int, repeat: int = 3) -> float:
+    source = make_template(lines)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        find_slot_blocks(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    print(f"{'lines':>8}  {'seconds':>9}  {'us/line':>8}")
+    for lines in (6_250, 12_500, 25_000, 50_000):
+        elapsed = bench(lines)
+        print(f"{lines:>8}  {elapsed:>9.4f}  {elapsed / lines * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Deterministic synthetic catalogs for the benchmarks.
+
+`generate_catalog(root, files)` writes `files` component templates spread
+over several catalog folders (the first without a prefix, the rest with
+one), in nested kebab-case folders. Templates are a mix of:
+
+- leaves with their own CSS/JS files and declarations,
+- slot-heavy layouts (`_slot` conditionals, `content('name')` calls),
+- pages using other components by dotted, kebab or prefixed names, with
+  raw blocks that must be left untouched.
+
+The same arguments always produce the same tree.
+"""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+from migrate import CatalogFolder
+
+FOLDERS = ["forms", "layout", "text-input", "data-table", "nav", "ui-kit", "modal"]
+
+LEAF = (
+    "{{#def label, kind=\"default\" #}}\n"
+    "{{#css {name}.css #}}\n"
+    "{{#js {name}.js #}}\n"
+    '<div class="{name_lower} {{{{ kind }}}}">{{{{ label }}}}</div>\n'
+)
+
+LAYOUT_BLOCK = (
+    '  {{% if _slot == "header{i}" %}}\n'
+    "    {{% if user %}}<b>{{{{ user.name }}}}</b>{{% endif %}}\n"
+    '  {{% elif _slot == "footer{i}" %}}\n'
+    "    <p>Footer {i}</p>\n"
+    "  {{% else %}}\n"
+    "    {{{{ content }}}}\n"
+    "  {{% endif %}}\n"
+)
+
+LAYOUT = (
+    "{{#def title #}}\n"
+    "<html>\n<head>{{{{ catalog.render_assets() }}}}</head>\n<body>\n"
+    "  <header>{{{{ content('header') }}}}</header>\n"
+    "{blocks}"
+    "  <footer>{{{{ content('footer') }}}}</footer>\n"
+    "</body>\n</html>\n"
+)
+
+RAW = (
+    "{% raw %}\n"
+    '  <Card title="not a component" />\n'
+    '  {% if _slot == "kept" %}{{ content() }}{% endif %}\n'
+    "{% endraw %}\n"
+)
+
+
+def _tag_name(rel: Path, prefix: str, rng: random.Random) -> str:
+    """Reference a component the way templates do: dotted path, with the
+    kebab-case folders optionally PascalCased, and the catalog prefix."""
+    dirs = list(rel.parts[:-1])
+    if dirs and rng.random() < 0.5:
+        dirs = ["".join(p.capitalize() for p in d.split("-")) for d in dirs]
+    name = ".".join([*dirs, rel.stem])
+    return f"{prefix}:{name}" if prefix else name
+
+
+def generate_catalog(
+    root: Path,
+    files: int,
+    prefixes: int = 3,
+    seed: int = 0,
+) -> list[CatalogFolder]:
+    """Write a catalog of `files` templates under `root` and return its
+    catalog folders."""
+    rng = random.Random(seed)
+    folders = [
+        CatalogFolder(
+            path=root / ("components" if i == 0 else f"vendor-{i}"),
+            prefix="" if i == 0 else f"v{i}",
+        )
+        for i in range(max(1, prefixes))
+    ]
+    written: list[str] = []  # tag names of the components written so far
+
+    for n in range(files):
+        folder = folders[n % len(folders)]
+        depth = rng.randint(0, 3)
+        dirs = rng.sample(FOLDERS, depth)
+        name = f"Comp{n}"
+        rel = Path(*dirs, f"{name}.jinja")
+        path = folder.path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        kind = n % 4 if written else 0
+        if kind == 0:
+            path.write_text(
+                LEAF.format(name=name, name_lower=name.lower()), encoding="utf-8"
+            )
+            path.with_suffix(".css").write_text(f".{name.lower()} {{}}\n")
+            path.with_suffix(".js").write_text(f"// {name}\n")
+        elif kind == 1:
+            blocks = "".join(LAYOUT_BLOCK.format(i=i) for i in range(rng.randint(2, 6)))
+            path.write_text(LAYOUT.format(blocks=blocks), encoding="utf-8")
+            path.with_suffix(".css").write_text(f".{name.lower()} {{}}\n")
+        else:
+            lines = ["{#def items #}", "<main>"]
+            for tag in rng.sample(written, min(len(written), rng.randint(2, 8))):
+                if rng.random() < 0.5:
+                    lines.append(f'  <{tag} label="x" />')
+                else:
+                    lines.append(f"  <{tag}>{{{{ items|length }}}}</{tag}>")
+            if rng.random() < 0.3:
+                lines.append(RAW.rstrip("\n"))
+            lines.append("</main>")
+            path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        written.append(_tag_name(rel, folder.prefix, rng))
+
+    return folders
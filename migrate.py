@@ -11,18 +11,43 @@ Migrates .jinja component templates from JinjaX syntax to Jx syntax:
 - Updates asset declarations and rendering calls
 
 Usage:
-    uv run migrate.py [--dry-run] [--no-backup]
+    uv run migrate.py [--dry-run] [--no-backup] [--jobs N]
 """
 
 from __future__ import annotations
 
 import argparse
+import bisect
+import cProfile
+import difflib
+import hashlib
+import json
+import os
 import re
 import shutil
+import subprocess
+import sys
+import tarfile
+import time
 import uuid
-from dataclasses import dataclass, field
+from collections import deque
+from collections.abc import Callable, Collection, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime
 from pathlib import Path
+from typing import TextIO
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python 3.10
+    tomllib = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 
 # ---------------------------------------------------------------------------
@@ -52,19 +77,33 @@ RX_EXISTING_IMPORT = re.compile(r"\{#-?\s*import\s+\"([^\"]+)\"\s+as\s+(\w+)\s*#
 RX_CONTENT_NAMED = re.compile(r"\{\{\s*content\(\s*[\"'](\w+)[\"']\s*\)\s*\}\}")
 RX_CONTENT_EMPTY_CALL = re.compile(r"\{\{\s*content\(\s*\)\s*\}\}")
 
-# Slot usage: _slot conditionals
-RX_SLOT_IF = re.compile(r"\{%-?\s*if\s+_slot\s*==\s*[\"'](\w+)[\"']\s*-?%\}")
-RX_SLOT_ELIF = re.compile(r"\{%-?\s*elif\s+_slot\s*==\s*[\"'](\w+)[\"']\s*-?%\}")
-RX_ELIF_OTHER = re.compile(r"\{%-?\s*elif\s+")
-RX_ELSE = re.compile(r"\{%-?\s*else\s*-?%\}")
-RX_ENDIF = re.compile(r"\{%-?\s*endif\s*-?%\}")
-RX_IF_OPEN = re.compile(r"\{%-?\s*if\s+")
+# Slot usage: every Jinja tag the _slot parser cares about, as one alternation
+# so a single finditer() walks them in order. Alternatives are tried in this
+# order, so `slot_if`/`slot_elif` win over the generic `if`/`elif_other`.
+RX_SLOT_TAG = re.compile(
+    r"(?P<slot_if>\{%-?\s*if\s+_slot\s*==\s*[\"'](?P<if_name>\w+)[\"']\s*-?%\})"
+    r"|(?P<if>\{%-?\s*if\s+)"
+    r"|(?P<slot_elif>\{%-?\s*elif\s+_slot\s*==\s*[\"'](?P<elif_name>\w+)[\"']\s*-?%\})"
+    r"|(?P<elif_other>\{%-?\s*elif\s+)"
+    r"|(?P<else>\{%-?\s*else\s*-?%\})"
+    r"|(?P<endif>\{%-?\s*endif\s*-?%\})"
+)
 
 # Asset rendering
 RX_CATALOG_RENDER_ASSETS = re.compile(
     r"\{\{\s*catalog\.render_assets\(\)\s*\}\}"
 )
 
+# Template segments: raw blocks, {# #} comments/metadata, {% %} statements
+# and {{ }} expressions. Anything in between is plain text.
+RX_SEGMENT = re.compile(
+    rf"(?P<raw>{RX_RAW.pattern})"
+    r"|(?P<comment>\{#.*?#\})"
+    r"|(?P<statement>\{%.*?%\})"
+    r"|(?P<expression>\{\{.*?\}\})",
+    re.DOTALL,
+)
+
 
 # ---------------------------------------------------------------------------
 # Data classes
@@ -104,23 +143,97 @@ class SlotBlock:
     default_body: str  # content from {% else %} branch
 
 
+@dataclass
+class Segment:
+    kind: str  # "text", "raw", "comment", "statement" or "expression"
+    text: str
+
+
+@dataclass
+class ChangeStats:
+    """Counts of the migrations applied to a template, or to all of them."""
+    imports_added: int = 0
+    slots_migrated: int = 0
+    fills_migrated: int = 0
+    asset_calls_migrated: int = 0
+
+    def add(self, other: ChangeStats) -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
 @dataclass
 class FileChanges:
     file_path: Path
     original: str
     transformed: str
     warnings: list[str] = field(default_factory=list)
+    uses: list[str] = field(default_factory=list)  # jinjax names of used components
+    unresolved: list[str] = field(default_factory=list)  # tags matching no component
+    stats: ChangeStats = field(default_factory=ChangeStats)
+    seconds: float = 0.0  # time spent reading and transforming the file
+    timings: dict[str, float] = field(default_factory=dict)  # phase -> seconds
 
     @property
     def changed(self) -> bool:
         return self.original != self.transformed
 
 
+@dataclass
+class MigratedSource:
+    """Result of migrate_source()."""
+    original: str
+    text: str
+    warnings: list[str] = field(default_factory=list)
+    uses: list[str] = field(default_factory=list)  # jinjax names of used components
+    stats: ChangeStats = field(default_factory=ChangeStats)
+
+    @property
+    def changed(self) -> bool:
+        return self.original != self.text
+
+
+@dataclass
+class FileSummary:
+    """What is kept of a transformed template once its text is dropped."""
+    file_path: Path
+    changed: bool
+    stats: ChangeStats
+
+
 @dataclass
 class MigrationResult:
     file_changes: list[FileChanges] = field(default_factory=list)
     asset_copies: list[tuple[Path, Path]] = field(default_factory=list)
+    # (copied destination, destination) pairs with identical content
+    asset_links: list[tuple[Path, Path]] = field(default_factory=list)
+    asset_bytes_saved: int = 0
+    # Planned copies whose destination already has the same content, and
+    # copies (also in asset_copies) that replace a different file
+    asset_unchanged: list[tuple[Path, Path]] = field(default_factory=list)
+    asset_conflicts: list[tuple[Path, Path]] = field(default_factory=list)
     warnings: list[str] = field(default_factory=list)
+    summaries: list[FileSummary] = field(default_factory=list)
+    stats: ChangeStats = field(default_factory=ChangeStats)  # changed files only
+
+    def add(self, changes: FileChanges, keep: bool = True) -> None:
+        """Record a transformed template. With keep=False only its summary
+        is kept, so its original and transformed text can be freed."""
+        self.summaries.append(
+            FileSummary(changes.file_path, changes.changed, changes.stats)
+        )
+        if changes.changed:
+            self.stats.add(changes.stats)
+        if changes.warnings:
+            self.warnings.extend(
+                f"{changes.file_path.name}: {w}" for w in changes.warnings
+            )
+        if keep:
+            self.file_changes.append(changes)
+
+    @property
+    def templates_modified(self) -> int:
+        return sum(1 for s in self.summaries if s.changed)
 
 
 # ---------------------------------------------------------------------------
@@ -157,47 +270,247 @@ def restore_raw_blocks(source: str, placeholders: dict[str, str]) -> str:
     return source
 
 
+def lex_template(source: str) -> list[Segment]:
+    """Split a template into text, raw, comment, statement and expression
+    segments. Joining the segments' text gives back the source."""
+    segments: list[Segment] = []
+    pos = 0
+    for m in RX_SEGMENT.finditer(source):
+        if m.start() > pos:
+            segments.append(Segment("text", source[pos:m.start()]))
+        segments.append(Segment(m.lastgroup or "text", m.group(0)))
+        pos = m.end()
+    if pos < len(source):
+        segments.append(Segment("text", source[pos:]))
+    return segments
+
+
+DEFAULT_IO_THREADS = 8
+
+
+def map_io(
+    fn: Callable, items: list, threads: int = 1
+) -> list[tuple[object, OSError | None]]:
+    """Call `fn` on every item, using up to `threads` threads for I/O-bound
+    work. Returns a (result, error) pair per item, in the items' order,
+    so callers can report failures the same way whatever the timing.
+    Errors other than OSError are raised."""
+    def call(item):
+        try:
+            return fn(item), None
+        except OSError as e:
+            return None, e
+    if threads <= 1 or len(items) < 2:
+        return [call(item) for item in items]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(call, items))
+
+
+def make_dirs(paths: list[Path]) -> None:
+    """Create the parent folder of every path, once per folder."""
+    for folder in sorted({path.parent for path in paths}):
+        folder.mkdir(parents=True, exist_ok=True)
+
+
+# ---------------------------------------------------------------------------
+# Phase timing hooks
+# ---------------------------------------------------------------------------
+
+# Called with (phase, seconds, file_path) each time a phase finishes. Phases
+# are "1", "2", "read", "3a/3c/3e", "3b", "3d", "3f", "backup", "3g" and
+# "assets"; per-template phases pass the template's path, the others None.
+PhaseHook = Callable[[str, float, "Path | None"], None]
+_phase_hooks: list[PhaseHook] = []
+
+
+def add_phase_hook(hook: PhaseHook) -> None:
+    """Subscribe to phase timings."""
+    _phase_hooks.append(hook)
+
+
+def remove_phase_hook(hook: PhaseHook) -> None:
+    _phase_hooks.remove(hook)
+
+
+def emit_phase(name: str, seconds: float, file_path: Path | None = None) -> None:
+    for hook in _phase_hooks:
+        hook(name, seconds, file_path)
+
+
+@contextmanager
+def timed_phase(name: str, file_path: Path | None = None) -> Iterator[None]:
+    """Time the enclosed block and report it to the phase hooks."""
+    if not _phase_hooks:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        emit_phase(name, time.perf_counter() - started, file_path)
+
+
+def _lap(timings: dict[str, float], name: str, started: float) -> float:
+    """Add the time since `started` to `timings[name]` and return now."""
+    now = time.perf_counter()
+    timings[name] = timings.get(name, 0.0) + now - started
+    return now
+
+
 # ---------------------------------------------------------------------------
 # Phase 1: Component Registry
 # ---------------------------------------------------------------------------
 
 
+def scan_templates(root: Path) -> list[tuple[Path, bool, bool]]:
+    """Find every .jinja template under `root` with a single directory walk.
+
+    Returns (template_path, has_css, has_js) tuples sorted by path, where the
+    flags tell whether a co-located .css/.js file with the same stem exists.
+    They come from the same directory listing, so no extra stat calls are made.
+    """
+    found: list[tuple[Path, bool, bool]] = []
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        names = {entry.name for entry in entries}
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                pending.append(Path(entry.path))
+            elif entry.name.endswith(".jinja"):
+                stem = entry.name[: -len(".jinja")]
+                found.append((
+                    Path(entry.path),
+                    f"{stem}.css" in names,
+                    f"{stem}.js" in names,
+                ))
+    found.sort(key=lambda item: item[0])
+    return found
+
+
+def component_name(rel: Path, prefix: str = "") -> str:
+    """The JinjaX name of a component, from its path relative to its catalog
+    folder. Directory parts keep their case and the stem is PascalCased:
+
+        common/Form.jinja -> common.Form
+        common/my-button.jinja -> common.MyButton
+        tab/index.jinja -> Tab (index convention)
+    """
+    parts = list(rel.parts)
+    if rel.stem.lower() == "index" and len(parts) > 1:
+        name_parts = parts[:-1]
+        # Last dir part becomes the component name (PascalCased)
+        name_parts[-1] = to_pascal_case(name_parts[-1])
+    else:
+        name_parts = [*parts[:-1], to_pascal_case(rel.stem)]
+    name = ".".join(name_parts)
+    return f"{prefix}:{name}" if prefix else name
+
+
 class ComponentRegistry:
     def __init__(self) -> None:
         self.components: dict[str, ComponentInfo] = {}  # keyed by jinjax_name
         self._folders: list[CatalogFolder] = []
-
-    def add_folder(self, folder: CatalogFolder) -> int:
-        """Scan a folder and register all components. Returns count."""
+        # Every template found by add_folder, in scan order (including ones
+        # whose name was already registered from an earlier folder)
+        self.templates: list[Path] = []
+        # Resolved template path -> ComponentInfo
+        self.by_path: dict[Path, ComponentInfo] = {}
+        # Jx import path -> ComponentInfo
+        self.by_import_path: dict[str, ComponentInfo] = {}
+        # Fallback indexes for resolve(): lowercased / normalized name -> matches.
+        # More than one match means the fallback is ambiguous.
+        self._by_lower: dict[str, list[ComponentInfo]] = {}
+        self._by_norm: dict[str, list[ComponentInfo]] = {}
+
+    def add_folder(
+        self, folder: CatalogFolder, migrated: Collection[Path] = ()
+    ) -> int:
+        """Scan a folder and register all components. Returns count.
+
+        `migrated` lists templates an earlier run already renamed to .jx (see
+        Manifest.migrated()). The ones inside this folder are registered as
+        components too, but are not added to `templates`."""
         self._folders.append(folder)
-        count = 0
         root = folder.path.resolve()
-        for jinja_file in sorted(root.rglob("*.jinja")):
-            rel = jinja_file.relative_to(root)
-            info = self._make_component_info(jinja_file, rel, root, folder.prefix)
+        found = scan_templates(root)
+        done = [path for path in migrated if path.is_relative_to(root)]
+        if done:
+            found += [
+                (
+                    path,
+                    path.with_suffix(".css").exists(),
+                    path.with_suffix(".js").exists(),
+                )
+                for path in done
+            ]
+            found.sort(key=lambda item: item[0])
+        count = self.add_entries(
+            (
+                (jinja_file.relative_to(root), has_css, has_js)
+                for jinja_file, has_css, has_js in found
+            ),
+            folder.prefix,
+            root,
+        )
+        if done:
+            skip = set(done)
+            self.templates = [t for t in self.templates if t not in skip]
+        return count
+
+    def add_entries(
+        self,
+        entries: Iterable[tuple[str | Path, bool, bool]],
+        prefix: str = "",
+        root: Path = Path(),
+    ) -> int:
+        """Register components from (path, has_css, has_js) entries without
+        touching the filesystem. Paths are relative to the catalog folder,
+        e.g. "common/Form.jinja"; `root` is only used to build the
+        components' file paths. Returns count."""
+        count = 0
+        for rel, has_css, has_js in entries:
+            rel = Path(rel)
+            jinja_file = root / rel
+            self.templates.append(jinja_file)
+            info = self._make_component_info(
+                jinja_file, rel, prefix, has_css, has_js
+            )
             if info.jinjax_name not in self.components:
-                self.components[info.jinjax_name] = info
+                self._register(info)
                 count += 1
         return count
 
+    @classmethod
+    def from_entries(
+        cls, entries: Iterable[tuple[str | Path, bool, bool]], prefix: str = ""
+    ) -> ComponentRegistry:
+        """Build a registry from an in-memory list of (path, has_css, has_js)."""
+        registry = cls()
+        registry.add_entries(entries, prefix)
+        return registry
+
+    def _register(self, info: ComponentInfo) -> None:
+        self.components[info.jinjax_name] = info
+        self.by_path[info.file_path] = info
+        self.by_import_path[info.import_path] = info
+        self._by_lower.setdefault(info.jinjax_name.lower(), []).append(info)
+        self._by_norm.setdefault(self._normalize(info.jinjax_name), []).append(info)
+
     def _make_component_info(
-        self, file_path: Path, rel: Path, root: Path, prefix: str
+        self,
+        file_path: Path,
+        rel: Path,
+        prefix: str,
+        has_css: bool,
+        has_js: bool,
     ) -> ComponentInfo:
-        parts = list(rel.parts)
-        stem = rel.stem
-        # Build JinjaX name: directory parts keep original case, stem is PascalCased
-        # e.g. common/Form.jinja -> common.Form
-        # e.g. common/my-button.jinja -> common.MyButton
-        # e.g. tab/index.jinja -> Tab (index convention)
-        if stem.lower() == "index" and len(parts) > 1:
-            name_parts = list(parts[:-1])
-            # Last dir part becomes the component name (PascalCased)
-            name_parts[-1] = to_pascal_case(name_parts[-1])
-        else:
-            name_parts = list(parts[:-1]) + [to_pascal_case(stem)]
-        jinjax_name = ".".join(name_parts)
-        if prefix:
-            jinjax_name = f"{prefix}:{jinjax_name}"
+        jinjax_name = component_name(rel, prefix)
 
         # Build Jx import path. The migration renames templates from .jinja
         # to .jx, so imports must reference the new extension.
@@ -208,12 +521,6 @@ class ComponentRegistry:
         else:
             import_path = import_str
 
-        # Check for co-located assets
-        css_path = file_path.with_suffix(".css")
-        js_path = file_path.with_suffix(".js")
-        has_css = css_path.exists()
-        has_js = js_path.exists()
-
         return ComponentInfo(
             jinjax_name=jinjax_name,
             file_path=file_path,
@@ -222,8 +529,8 @@ class ComponentRegistry:
             import_path=import_path,
             has_css=has_css,
             has_js=has_js,
-            css_path=css_path if has_css else None,
-            js_path=js_path if has_js else None,
+            css_path=file_path.with_suffix(".css") if has_css else None,
+            js_path=file_path.with_suffix(".js") if has_js else None,
         )
 
     @staticmethod
@@ -237,24 +544,39 @@ class ComponentRegistry:
         """
         return name.replace("-", "").replace("_", "").lower()
 
-    def resolve(self, tag_name: str) -> ComponentInfo | None:
-        """Resolve a JinjaX tag name to a ComponentInfo."""
-        # Direct lookup
-        if tag_name in self.components:
-            return self.components[tag_name]
+    def _fallback_matches(self, tag_name: str) -> list[ComponentInfo]:
         # Case-insensitive fallback (directory parts may differ in case)
-        tag_lower = tag_name.lower()
-        for name, info in self.components.items():
-            if name.lower() == tag_lower:
-                return info
+        matches = self._by_lower.get(tag_name.lower())
+        if matches:
+            return matches
         # Normalized fallback: strips hyphens/underscores so PascalCase path
         # segments match kebab-case folder names
-        tag_norm = self._normalize(tag_name)
-        for name, info in self.components.items():
-            if self._normalize(name) == tag_norm:
-                return info
+        return self._by_norm.get(self._normalize(tag_name), [])
+
+    def resolve(self, tag_name: str) -> ComponentInfo | None:
+        """Resolve a JinjaX tag name to a ComponentInfo.
+
+        Returns None for unknown tags and for fallback lookups that match
+        more than one component (see `ambiguous_matches`).
+        """
+        info = self.components.get(tag_name)
+        if info is not None:
+            return info
+        matches = self._fallback_matches(tag_name)
+        if len(matches) == 1:
+            return matches[0]
         return None
 
+    def ambiguous_matches(self, tag_name: str) -> list[str]:
+        """Return the component names a tag could refer to when the
+        fallback lookup is ambiguous, or an empty list otherwise."""
+        if tag_name in self.components:
+            return []
+        matches = self._fallback_matches(tag_name)
+        if len(matches) < 2:
+            return []
+        return [info.jinjax_name for info in matches]
+
     def get_alias(self, info: ComponentInfo) -> str:
         """Determine the import alias for a component."""
         # Use the last segment of the JinjaX name
@@ -302,13 +624,75 @@ def plan_asset_copies(
     return copies
 
 
-def execute_asset_copies(copies: list[tuple[Path, Path]], dry_run: bool) -> None:
-    """Copy asset files to static folder."""
+def hash_file(path: Path) -> str:
+    """SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compare_asset_copies(
+    copies: list[tuple[Path, Path]],
+) -> tuple[list[tuple[Path, Path]], list[tuple[Path, Path]], list[tuple[Path, Path]]]:
+    """Compare each planned copy with what is already at its destination.
+
+    Returns (copies, unchanged, conflicts): the copies still to make, those
+    whose destination already has the same content, and those (also in
+    `copies`) that would replace a different file. Files of the same size
+    and mtime are taken as identical, as copies keep the source's mtime;
+    otherwise same-size files are compared by hash.
+    """
+    to_copy: list[tuple[Path, Path]] = []
+    unchanged: list[tuple[Path, Path]] = []
+    conflicts: list[tuple[Path, Path]] = []
     for src, dest in copies:
-        if dry_run:
+        try:
+            dest_stat = dest.stat()
+        except FileNotFoundError:
+            to_copy.append((src, dest))
             continue
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(src, dest)
+        src_stat = src.stat()
+        if src_stat.st_size == dest_stat.st_size and (
+            src_stat.st_mtime_ns == dest_stat.st_mtime_ns
+            or hash_file(src) == hash_file(dest)
+        ):
+            unchanged.append((src, dest))
+        else:
+            to_copy.append((src, dest))
+            conflicts.append((src, dest))
+    return to_copy, unchanged, conflicts
+
+
+def dedupe_asset_copies(
+    copies: list[tuple[Path, Path]],
+) -> tuple[list[tuple[Path, Path]], list[tuple[Path, Path]], int]:
+    """Copy identical assets only once.
+
+    Returns (copies, links, bytes_saved): the copies still to make, and
+    (copied destination, destination) pairs to hardlink instead of copying.
+    Only sources sharing their size with another one are hashed.
+    """
+    by_size: dict[int, list[tuple[Path, Path]]] = {}
+    for copy in copies:
+        by_size.setdefault(copy[0].stat().st_size, []).append(copy)
+
+    duplicates: dict[Path, Path] = {}  # destination -> copied destination
+    saved = 0
+    for size, group in by_size.items():
+        if len(group) < 2:
+            continue
+        first_dest: dict[str, Path] = {}
+        for src, dest in group:
+            target = first_dest.setdefault(hash_file(src), dest)
+            if target != dest:
+                duplicates[dest] = target
+                saved += size
+
+    unique = [(src, dest) for src, dest in copies if dest not in duplicates]
+    links = [(duplicates[dest], dest) for _, dest in copies if dest in duplicates]
+    return unique, links, saved
 
 
 # ---------------------------------------------------------------------------
@@ -316,11 +700,13 @@ def execute_asset_copies(copies: list[tuple[Path, Path]], dry_run: bool) -> None
 # ---------------------------------------------------------------------------
 
 
-def migrate_slot_definitions(source: str) -> str:
+def migrate_slot_definitions(source: str, stats: ChangeStats | None = None) -> str:
     """Replace {{ content("name") }} with {% slot name %}{% endslot %}
     and {{ content() }} with {{ content }}."""
     # Named slots
-    source = RX_CONTENT_NAMED.sub(r"{% slot \1 %}{% endslot %}", source)
+    source, count = RX_CONTENT_NAMED.subn(r"{% slot \1 %}{% endslot %}", source)
+    if stats is not None:
+        stats.slots_migrated += count
     # Empty call -> plain variable
     source = RX_CONTENT_EMPTY_CALL.sub("{{ content }}", source)
     return source
@@ -331,87 +717,81 @@ def migrate_slot_definitions(source: str) -> str:
 # ---------------------------------------------------------------------------
 
 
+@dataclass
+class _SlotFrame:
+    """An open `{% if _slot == ... %}` while walking the tags."""
+    start: int
+    current_name: str | None
+    current_start: int
+    branches: list[SlotBranch] = field(default_factory=list)
+    is_pure_slot: bool = True  # all branches use _slot == "..."
+
+
 def find_slot_blocks(source: str) -> list[SlotBlock]:
-    """Find all {% if _slot == "..." %} conditional blocks and parse them."""
+    """Find all {% if _slot == "..." %} conditional blocks and parse them.
+
+    Walks the relevant Jinja tags once, keeping a stack with one entry per
+    open `{% if %}` (None for non-_slot conditionals), so nested _slot
+    conditionals are parsed independently in the same pass.
+    """
     blocks: list[SlotBlock] = []
+    stack: list[_SlotFrame | None] = []
 
-    # Find all potential _slot if-blocks
-    for m in RX_SLOT_IF.finditer(source):
-        start = m.start()
-        first_name = m.group(1)
-        pos = m.end()
+    for m in RX_SLOT_TAG.finditer(source):
+        tag_type = m.lastgroup
 
-        branches: list[SlotBranch] = []
-        default_body = ""
-        depth = 1
-        current_name: str | None = first_name
-        current_start = pos
-        is_pure_slot = True  # all branches use _slot == "..."
-        end = -1
-
-        while depth > 0 and pos < len(source):
-            # Find the next relevant Jinja tag
-            next_matches = []
-            for rx, label in [
-                (RX_IF_OPEN, "if"),
-                (RX_SLOT_ELIF, "slot_elif"),
-                (RX_ELIF_OTHER, "elif_other"),
-                (RX_ELSE, "else"),
-                (RX_ENDIF, "endif"),
-            ]:
-                found = rx.search(source, pos)
-                if found:
-                    next_matches.append((found.start(), found, label))
-
-            if not next_matches:
-                break
+        if tag_type == "slot_if":
+            stack.append(_SlotFrame(m.start(), m.group("if_name"), m.end()))
+            continue
+        if tag_type == "if":
+            stack.append(None)
+            continue
+        if not stack:
+            continue
 
-            next_matches.sort(key=lambda x: x[0])
-            _, tag_match, tag_type = next_matches[0]
-
-            if tag_type == "if":
-                depth += 1
-                pos = tag_match.end()
-            elif tag_type == "endif":
-                depth -= 1
-                if depth == 0:
-                    body = source[current_start:tag_match.start()]
-                    if current_name is not None:
-                        branches.append(SlotBranch(current_name, body))
-                    else:
-                        default_body = body
-                    end = tag_match.end()
-                pos = tag_match.end()
-            elif depth == 1 and tag_type == "slot_elif":
-                body = source[current_start:tag_match.start()]
-                if current_name is not None:
-                    branches.append(SlotBranch(current_name, body))
-                current_name = tag_match.group(1)
-                current_start = tag_match.end()
-                pos = tag_match.end()
-            elif depth == 1 and tag_type == "elif_other":
-                # Not a _slot elif -- mixed conditional, can't migrate safely
-                is_pure_slot = False
-                pos = tag_match.end()
-                # Skip the rest of this block
-                break
-            elif depth == 1 and tag_type == "else":
-                body = source[current_start:tag_match.start()]
-                if current_name is not None:
-                    branches.append(SlotBranch(current_name, body))
-                current_name = None
-                current_start = tag_match.end()
-                pos = tag_match.end()
+        frame = stack[-1]
+        if tag_type == "endif":
+            stack.pop()
+            if frame is None or not frame.is_pure_slot:
+                continue
+            body = source[frame.current_start:m.start()]
+            default_body = ""
+            if frame.current_name is not None:
+                frame.branches.append(SlotBranch(frame.current_name, body))
             else:
-                pos = tag_match.end()
-
-        if is_pure_slot and end > start and branches:
-            blocks.append(SlotBlock(start, end, branches, default_body))
+                default_body = body
+            if frame.branches:
+                blocks.append(
+                    SlotBlock(frame.start, m.end(), frame.branches, default_body)
+                )
+            continue
 
+        if frame is None or not frame.is_pure_slot:
+            continue
+        if tag_type == "slot_elif":
+            body = source[frame.current_start:m.start()]
+            if frame.current_name is not None:
+                frame.branches.append(SlotBranch(frame.current_name, body))
+            frame.current_name = m.group("elif_name")
+            frame.current_start = m.end()
+        elif tag_type == "elif_other":
+            # Not a _slot elif -- mixed conditional, can't migrate safely
+            frame.is_pure_slot = False
+        elif tag_type == "else":
+            body = source[frame.current_start:m.start()]
+            if frame.current_name is not None:
+                frame.branches.append(SlotBranch(frame.current_name, body))
+            frame.current_name = None
+            frame.current_start = m.end()
+
+    # Inner blocks close first; report them in source order
+    blocks.sort(key=lambda b: b.start)
     return blocks
 
 
-def migrate_slot_usage(source: str) -> tuple[str, list[str]]:
+def migrate_slot_usage(
+    source: str, stats: ChangeStats | None = None
+) -> tuple[str, list[str]]:
     """Replace _slot conditionals with {% fill %} blocks.
     Returns (transformed_source, warnings)."""
     warnings: list[str] = []
@@ -419,6 +799,8 @@ def migrate_slot_usage(source: str) -> tuple[str, list[str]]:
 
     if not blocks:
         return source, warnings
+    if stats is not None:
+        stats.fills_migrated += sum(len(block.branches) for block in blocks)
 
     # Apply replacements in reverse order to preserve offsets
     for block in reversed(blocks):
@@ -445,9 +827,12 @@ def migrate_slot_usage(source: str) -> tuple[str, list[str]]:
 # ---------------------------------------------------------------------------
 
 
-def migrate_asset_rendering(source: str) -> str:
+def migrate_asset_rendering(source: str, stats: ChangeStats | None = None) -> str:
     """Replace {{ catalog.render_assets() }} with {{ assets.render() }}."""
-    return RX_CATALOG_RENDER_ASSETS.sub("{{ assets.render() }}", source)
+    source, count = RX_CATALOG_RENDER_ASSETS.subn("{{ assets.render() }}", source)
+    if stats is not None:
+        stats.asset_calls_migrated += count
+    return source
 
 
 # ---------------------------------------------------------------------------
@@ -514,9 +899,7 @@ def add_auto_assets(
         # Insert after last asset declaration
         # Find end of line
         nl = source.find("\n", last_asset_end)
-        if nl == -1:
-            nl = last_asset_end
-        insert_pos = nl + 1
+        insert_pos = (nl + 1) if nl != -1 else last_asset_end
     elif def_match:
         insert_pos = def_match.start()
     else:
@@ -577,22 +960,62 @@ def find_component_tags(source: str) -> set[str]:
     return tags
 
 
+def rename_tags(source: str, tag_renames: dict[str, str]) -> str:
+    """Rename opening and closing component tags in a single pass.
+
+    The result is the same as substituting each rename in order: a tag
+    renamed to a name that a later entry renames again follows that chain.
+    """
+    names = list(tag_renames)
+    final: dict[str, str] = {}
+    for i, old_tag in enumerate(names):
+        new_alias = tag_renames[old_tag]
+        for later in names[i + 1:]:
+            if new_alias == later:
+                new_alias = tag_renames[later]
+        if new_alias != old_tag:
+            final[old_tag] = new_alias
+    if not final:
+        return source
+
+    # Longest first so a name is never cut short by one of its prefixes
+    alternation = "|".join(
+        re.escape(name) for name in sorted(final, key=len, reverse=True)
+    )
+    rx = re.compile(rf"<(?P<slash>/?)(?P<tag>{alternation})(?P<after>\s|\n|/|>)")
+
+    def replacer(m: re.Match) -> str:
+        return f"<{m.group('slash')}{final[m.group('tag')]}{m.group('after')}"
+
+    return rx.sub(replacer, source)
+
+
 def generate_imports_and_rename(
     source: str,
     file_path: Path,
     registry: ComponentRegistry,
+    used: set[str] | None = None,
+    stats: ChangeStats | None = None,
+    unresolved: set[str] | None = None,
 ) -> tuple[str, list[str]]:
     """Generate {#import ...#} statements and rename dotted/prefixed tags.
-    Returns (transformed_source, warnings)."""
-    warnings: list[str] = []
+    Returns (transformed_source, warnings).
 
-    # Protect raw blocks
-    source, raw_placeholders = protect_raw_blocks(source)
+    If `used` is given, the names of the components the template uses are
+    added to it; if `unresolved` is given, the component tags that do not
+    resolve to exactly one component are added to it. Raw blocks must
+    already be replaced by placeholders, as `transform_source` does.
+    """
+    warnings: list[str] = []
 
     # Find existing imports to avoid duplicates
     existing_imports: dict[str, str] = {}  # import_path -> alias
+    imported: dict[str, ComponentInfo] = {}  # alias -> imported component
     for m in RX_EXISTING_IMPORT.finditer(source):
         existing_imports[m.group(1)] = m.group(2)
+        info = registry.by_import_path.get(m.group(1))
+        if info is not None:
+            imported[m.group(2)] = info
 
     # Find all component tags
     tags = find_component_tags(source)
@@ -603,9 +1026,20 @@ def generate_imports_and_rename(
     alias_counts: dict[str, list[str]] = {}  # alias -> [jinjax_names]
 
     for tag in sorted(tags):
-        info = registry.resolve(tag)
+        # In an already migrated .jx, tags are the aliases of its imports
+        info = imported.get(tag) or registry.resolve(tag)
         if info is None:
+            if unresolved is not None:
+                unresolved.add(tag)
+            candidates = registry.ambiguous_matches(tag)
+            if candidates:
+                warnings.append(
+                    f"Ambiguous component tag '{tag}': matches {candidates}. "
+                    "Left unchanged."
+                )
             continue  # Not a known component (could be HTML element)
+        if used is not None:
+            used.add(info.jinjax_name)
 
         # Already imported?
         if info.import_path in existing_imports:
@@ -645,15 +1079,7 @@ def generate_imports_and_rename(
             tag_renames[name] = qualified
 
     # Rename tags in source
-    for old_tag, new_alias in tag_renames.items():
-        # Escape dots and colons for regex
-        escaped = re.escape(old_tag)
-        # Opening tags: <old.Tag -> <NewAlias
-        source = re.sub(
-            rf"<(?P<slash>/?)(?P<tag>{escaped})(?P<after>\s|\n|/|>)",
-            rf"<\g<slash>{new_alias}\g<after>",
-            source,
-        )
+    source = rename_tags(source, tag_renames)
 
     # Build import lines
     import_lines: list[str] = []
@@ -661,6 +1087,9 @@ def generate_imports_and_rename(
         if imp_path not in existing_imports:
             import_lines.append(f'{{#import "{imp_path}" as {alias} #}}')
 
+    if stats is not None:
+        stats.imports_added += len(import_lines)
+
     # Insert imports at the top of the file
     if import_lines:
         import_block = "\n".join(import_lines) + "\n"
@@ -681,9 +1110,6 @@ def generate_imports_and_rename(
 
         source = source[:insert_pos] + import_block + source[insert_pos:]
 
-    # Restore raw blocks
-    source = restore_raw_blocks(source, raw_placeholders)
-
     return source, warnings
 
 
@@ -692,76 +1118,1060 @@ def generate_imports_and_rename(
 # ---------------------------------------------------------------------------
 
 
-def transform_file(
+def visit_segment(
+    segment: Segment,
+    component_info: ComponentInfo | None,
+    url_prefix: str,
+    stats: ChangeStats | None = None,
+) -> str:
+    """Apply the transforms that only ever touch a single segment."""
+    if segment.kind == "expression":
+        # Phase 3a: Migrate slot definitions
+        text = migrate_slot_definitions(segment.text, stats)
+        # Phase 3c: Update asset rendering calls
+        return migrate_asset_rendering(text, stats)
+    if segment.kind == "comment":
+        # Phase 3e: Update existing asset declaration paths
+        return update_asset_paths(segment.text, component_info, url_prefix)
+    return segment.text
+
+
+def transform_source(
+    source: str,
     file_path: Path,
     registry: ComponentRegistry,
     url_prefix: str,
+    component_info: ComponentInfo | None = None,
 ) -> FileChanges:
-    """Apply all transformations to a single .jinja file."""
-    original = file_path.read_text(encoding="utf-8")
-    source = original
+    """Apply all transformations to a template's source."""
+    original = source
     all_warnings: list[str] = []
-
-    # Determine if this file is a known component (for asset handling)
-    component_info: ComponentInfo | None = None
-    for info in registry.components.values():
-        if info.file_path == file_path:
-            component_info = info
-            break
-
-    # Phase 3a: Migrate slot definitions
-    source = migrate_slot_definitions(source)
+    used: set[str] = set()
+    unresolved: set[str] = set()
+    stats = ChangeStats()
+    timings: dict[str, float] = {}
+    lap = time.perf_counter()
+
+    # Lex once. Raw blocks become placeholders for every later phase and
+    # single-segment transforms run while the text is put back together.
+    raw_placeholders: dict[str, str] = {}
+    parts: list[str] = []
+    for segment in lex_template(source):
+        if segment.kind == "raw":
+            uid = f"__RAW_{uuid.uuid4().hex}__"
+            raw_placeholders[uid] = segment.text
+            parts.append(uid)
+        else:
+            parts.append(visit_segment(segment, component_info, url_prefix, stats))
+    source = "".join(parts)
+    lap = _lap(timings, "3a/3c/3e", lap)
 
     # Phase 3b: Migrate slot usage
-    source, slot_warnings = migrate_slot_usage(source)
+    source, slot_warnings = migrate_slot_usage(source, stats)
     all_warnings.extend(slot_warnings)
+    lap = _lap(timings, "3b", lap)
 
-    # Phase 3c: Update asset rendering calls
-    source = migrate_asset_rendering(source)
-
-    # Phase 3d: Add auto-discovered asset declarations
+    # Phase 3d: Add auto-discovered asset declarations (already final URLs,
+    # so they are added after 3e has run)
     source = add_auto_assets(source, component_info, url_prefix)
-
-    # Phase 3e: Update existing asset declaration paths
-    source = update_asset_paths(source, component_info, url_prefix)
+    lap = _lap(timings, "3d", lap)
 
     # Phase 3f: Generate imports and rename tags (MUST be last)
     source, import_warnings = generate_imports_and_rename(
-        source, file_path, registry
+        source, file_path, registry, used, stats, unresolved
     )
     all_warnings.extend(import_warnings)
+    transformed = restore_raw_blocks(source, raw_placeholders)
+    _lap(timings, "3f", lap)
 
     return FileChanges(
         file_path=file_path,
         original=original,
-        transformed=source,
+        transformed=transformed,
         warnings=all_warnings,
+        uses=sorted(used),
+        unresolved=sorted(unresolved),
+        stats=stats,
+        timings=timings,
     )
 
 
+def transform_file(
+    file_path: Path,
+    registry: ComponentRegistry,
+    url_prefix: str,
+) -> FileChanges:
+    """Apply all transformations to a single .jinja file, or re-migrate a
+    .jx file that an earlier run already migrated."""
+    started = time.perf_counter()
+    original = file_path.read_text(encoding="utf-8")
+
+    # Determine if this file is a known component (for asset handling)
+    component_info = registry.by_path.get(file_path.resolve().with_suffix(".jinja"))
+    read_seconds = time.perf_counter() - started
+
+    changes = transform_source(
+        original, file_path, registry, url_prefix, component_info
+    )
+    changes.timings = {"read": read_seconds, **changes.timings}
+    changes.seconds = time.perf_counter() - started
+    return changes
+
+
+def migrate_source(
+    text: str,
+    *,
+    registry: ComponentRegistry,
+    url_prefix: str,
+    component: str | None = None,
+) -> MigratedSource:
+    """Migrate a template's source without touching the filesystem.
+
+    `component` is the jinjax name of the component the source belongs to
+    (e.g. "common.Form" or "ui:Alert"), so its co-located assets are
+    declared; leave it out for pages and other non-component templates.
+    Raises ValueError if the component is not registered.
+    """
+    component_info = None
+    if component is not None:
+        component_info = registry.components.get(component)
+        if component_info is None:
+            raise ValueError(f"Unknown component {component!r}")
+        file_path = component_info.file_path
+    else:
+        file_path = Path("<string>")
+
+    changes = transform_source(
+        text, file_path, registry, url_prefix, component_info
+    )
+    return MigratedSource(
+        original=changes.original,
+        text=changes.transformed,
+        warnings=changes.warnings,
+        uses=changes.uses,
+        stats=changes.stats,
+    )
+
+
+TRANSFORM_CHUNK_SIZE = 16
+TRANSFORM_CHUNKS_PER_JOB = 2
+
+# Per-process state for parallel Phase 3, set once by the pool initializer
+# so the registry is pickled once per worker instead of once per file.
+_worker_registry: ComponentRegistry | None = None
+_worker_url_prefix: str = ""
+
+
+def _init_worker(registry: ComponentRegistry, url_prefix: str) -> None:
+    global _worker_registry, _worker_url_prefix
+    _worker_registry = registry
+    _worker_url_prefix = url_prefix
+
+
+def _transform_in_worker(files: list[Path]) -> list[FileChanges]:
+    assert _worker_registry is not None
+    return [
+        transform_file(file_path, _worker_registry, _worker_url_prefix)
+        for file_path in files
+    ]
+
+
+def transform_files(
+    files: list[Path],
+    registry: ComponentRegistry,
+    url_prefix: str,
+    jobs: int = 1,
+) -> Iterator[FileChanges]:
+    """Transform files, yielding their FileChanges in the order given.
+    With jobs > 1 the work is spread over that many worker processes."""
+    for changes in _transform_files(files, registry, url_prefix, jobs):
+        # Timings are measured where the work ran (possibly a worker process)
+        # and reported to the hooks here, in the calling process.
+        for name, seconds in changes.timings.items():
+            emit_phase(name, seconds, changes.file_path)
+        yield changes
+
+
+def _transform_files(
+    files: list[Path],
+    registry: ComponentRegistry,
+    url_prefix: str,
+    jobs: int,
+) -> Iterator[FileChanges]:
+    if jobs <= 1 or len(files) < 2:
+        for file_path in files:
+            yield transform_file(file_path, registry, url_prefix)
+        return
+
+    # Files go to the workers in small chunks, with at most
+    # TRANSFORM_CHUNKS_PER_JOB chunks per worker submitted ahead of the one
+    # being consumed, so results never pile up when the caller (e.g. a
+    # --stream apply) is slower than the workers.
+    chunksize = max(1, min(TRANSFORM_CHUNK_SIZE, len(files) // (jobs * 4)))
+    chunks = (files[i:i + chunksize] for i in range(0, len(files), chunksize))
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(registry, url_prefix),
+    ) as pool:
+        pending = deque(
+            pool.submit(_transform_in_worker, chunk)
+            for _, chunk in zip(range(jobs * TRANSFORM_CHUNKS_PER_JOB), chunks)
+        )
+        try:
+            while pending:
+                results = pending.popleft().result()
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.append(pool.submit(_transform_in_worker, chunk))
+                yield from results
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+# ---------------------------------------------------------------------------
+# Incremental runs: content-hash manifest
+# ---------------------------------------------------------------------------
+
+MANIFEST_NAME = ".jx-migrate-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def write_text_atomic(path: Path, text: str) -> None:
+    """Write a file through a temporary sibling and os.replace(), so readers
+    (and crashes) see either the old content or the new one."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def hash_text(text: str) -> str:
+    """SHA-256 hex digest of a text's UTF-8 encoding."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def registry_fingerprint(registry: ComponentRegistry, url_prefix: str) -> str:
+    """Hash everything outside a template that can change its migrated output:
+    the registered components and the asset URL prefix."""
+    digest = hashlib.sha256(url_prefix.encode("utf-8"))
+    for name in sorted(registry.components):
+        info = registry.components[name]
+        digest.update(
+            f"\0{name}\0{info.import_path}\0{info.rel_path}\0{info.prefix}"
+            f"\0{info.has_css:d}{info.has_js:d}".encode()
+        )
+    return digest.hexdigest()
+
+
+@dataclass
+class ManifestEntry:
+    input_hash: str   # SHA-256 of the .jinja source
+    fingerprint: str  # registry_fingerprint() when it was migrated
+    output_hash: str  # SHA-256 of the .jx written for it
+
+
+class Manifest:
+    """Record of migrated templates, keyed by their .jinja path, so later
+    runs can skip templates whose migrated output is already on disk."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.entries: dict[str, ManifestEntry] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> Manifest:
+        """Load a manifest, or return an empty one if the file is missing
+        or was written by an incompatible version."""
+        manifest = cls(path)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return manifest
+        if data.get("version") != MANIFEST_VERSION:
+            return manifest
+        for key, entry in data.get("files", {}).items():
+            manifest.entries[key] = ManifestEntry(**entry)
+        return manifest
+
+    def save(self) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "files": {
+                key: vars(entry) for key, entry in sorted(self.entries.items())
+            },
+        }
+        write_text_atomic(self.path, json.dumps(data, indent=1) + "\n")
+
+    def record(self, changes: FileChanges, fingerprint: str) -> None:
+        jinja_file = changes.file_path.with_suffix(".jinja")
+        self.entries[str(jinja_file)] = ManifestEntry(
+            input_hash=hash_text(changes.original),
+            fingerprint=fingerprint,
+            output_hash=hash_text(changes.transformed),
+        )
+
+    def is_up_to_date(self, file_path: Path, fingerprint: str) -> bool:
+        """True if the template was migrated with the same input and registry
+        and its .jx output is still on disk unchanged."""
+        entry = self.entries.get(str(file_path))
+        if entry is None or entry.fingerprint != fingerprint:
+            return False
+        try:
+            if hash_text(file_path.read_text(encoding="utf-8")) != entry.input_hash:
+                return False
+            output = file_path.with_suffix(".jx").read_text(encoding="utf-8")
+        except OSError:
+            return False
+        return hash_text(output) == entry.output_hash
+
+    def migrated(self) -> list[Path]:
+        """Recorded templates whose .jinja is gone but whose .jx is still on
+        disk: components an earlier run already renamed, which a scan for
+        .jinja files no longer finds."""
+        paths = [Path(key) for key in self.entries]
+        return [
+            path
+            for path in paths
+            if not path.exists() and path.with_suffix(".jx").exists()
+        ]
+
+
+USAGE_GRAPH_NAME = ".jx-migrate-usage.json"
+USAGE_GRAPH_VERSION = 2
+
+
+class UsageGraph:
+    """Which templates use which components, as found during Phase 3f.
+
+    Lets a single renamed or moved component be re-migrated by
+    re-transforming only the templates that use it. The component tags
+    that resolved to nothing are kept too, so the templates that use a
+    component can be found once it is added.
+    """
+
+    def __init__(self) -> None:
+        self.uses: dict[Path, set[str]] = {}        # template -> component names
+        self.dependents: dict[str, set[Path]] = {}  # component name -> templates
+        self.unresolved: dict[Path, set[str]] = {}  # template -> unknown tags
+
+    def update(
+        self, file_path: Path, uses: list[str], unresolved: Iterable[str] = ()
+    ) -> None:
+        """Replace the recorded usage of a template."""
+        self.unresolved.pop(file_path, None)
+        if unresolved:
+            self.unresolved[file_path] = set(unresolved)
+        for name in self.uses.pop(file_path, set()):
+            dependents = self.dependents[name]
+            dependents.discard(file_path)
+            if not dependents:
+                del self.dependents[name]
+        if not uses:
+            return
+        self.uses[file_path] = set(uses)
+        for name in uses:
+            self.dependents.setdefault(name, set()).add(file_path)
+
+    def dependents_of(self, name: str) -> list[Path]:
+        """Templates that use the named component, sorted."""
+        return sorted(self.dependents.get(name, ()))
+
+    def affected_by(self, name: str, registry: ComponentRegistry) -> set[Path]:
+        """Templates that use a component, given by its recorded name or by
+        any tag name the registry resolves to it."""
+        affected = set(self.dependents.get(name, ()))
+        info = registry.resolve(name)
+        if info is not None:
+            affected.update(self.dependents.get(info.jinjax_name, ()))
+        return affected
+
+    def resolved_by(self, registry: ComponentRegistry) -> set[Path]:
+        """Templates using a tag that resolved to nothing when they were
+        transformed but resolves with `registry`, e.g. to a new component."""
+        return {
+            file_path
+            for file_path, tags in self.unresolved.items()
+            if any(registry.resolve(tag) is not None for tag in tags)
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> UsageGraph | None:
+        """Load a saved graph. Returns None if it is missing or unreadable."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != USAGE_GRAPH_VERSION:
+            return None
+        graph = cls()
+        unresolved = data.get("unresolved", {})
+        for file_path in data.get("uses", {}).keys() | unresolved.keys():
+            graph.update(
+                Path(file_path),
+                data["uses"].get(file_path, []),
+                unresolved.get(file_path, []),
+            )
+        return graph
+
+    def save(self, path: Path) -> None:
+        data = {
+            "version": USAGE_GRAPH_VERSION,
+            "uses": {
+                str(file_path): sorted(uses)
+                for file_path, uses in sorted(self.uses.items())
+            },
+            "unresolved": {
+                str(file_path): sorted(tags)
+                for file_path, tags in sorted(self.unresolved.items())
+            },
+        }
+        write_text_atomic(path, json.dumps(data, indent=1) + "\n")
+
+
+# ---------------------------------------------------------------------------
+# Watch mode
+# ---------------------------------------------------------------------------
+
+DEFAULT_WATCH_INTERVAL = 1.0
+WATCHED_SUFFIXES = (".jinja", ".css", ".js")
+
+
+def snapshot_tree(folders: list[CatalogFolder]) -> dict[Path, tuple[int, int]]:
+    """(mtime_ns, size) of every template and asset in the catalog folders."""
+    found: dict[Path, tuple[int, int]] = {}
+    pending = [folder.path.resolve() for folder in folders]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                pending.append(Path(entry.path))
+            elif entry.name.endswith(WATCHED_SUFFIXES):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                found[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+class Watcher:
+    """Re-transform templates as they change, by polling file stats.
+
+    Modified templates are transformed again. When templates are created or
+    deleted, or component assets come and go, the registry is rebuilt and
+    the templates that use an added or removed component (according to the
+    usage graph) are transformed again too, as their imports change.
+
+    Only the first pass uses `jobs` processes; polls usually touch a few
+    files, which a process pool would only slow down.
+    """
+
+    def __init__(
+        self,
+        folders: list[CatalogFolder],
+        registry: ComponentRegistry,
+        url_prefix: str,
+        jobs: int = 1,
+    ) -> None:
+        self.folders = folders
+        self.registry = registry
+        self.url_prefix = url_prefix
+        self.jobs = jobs
+        self.graph = UsageGraph()
+        self.snapshot = snapshot_tree(folders)
+
+    def transform(self, files: list[Path], jobs: int = 1) -> list[FileChanges]:
+        results = list(transform_files(files, self.registry, self.url_prefix, jobs))
+        for changes in results:
+            self.graph.update(changes.file_path, changes.uses, changes.unresolved)
+        return results
+
+    def prime(self) -> list[FileChanges]:
+        """Transform every template, recording which components they use."""
+        return self.transform(self.registry.templates, self.jobs)
+
+    def poll(self) -> tuple[list[FileChanges], list[Path]]:
+        """Check for changes since the last poll. Returns the transformed
+        templates and the templates that were deleted."""
+        old, new = self.snapshot, snapshot_tree(self.folders)
+        self.snapshot = new
+        created = new.keys() - old.keys()
+        deleted = old.keys() - new.keys()
+        modified = {path for path in new.keys() & old.keys() if new[path] != old[path]}
+        if not (created or deleted or modified):
+            return [], []
+
+        targets = {path for path in created | modified if path.suffix == ".jinja"}
+        deleted_templates = sorted(p for p in deleted if p.suffix == ".jinja")
+        for path in deleted_templates:
+            self.graph.update(path, [])
+
+        changed_assets = {
+            path for path in created | deleted if path.suffix != ".jinja"
+        }
+        if changed_assets or deleted_templates or targets & created:
+            old_names = set(self.registry.components)
+            registry = ComponentRegistry()
+            for folder in self.folders:
+                registry.add_folder(folder)
+            self.registry = registry
+            for name in old_names ^ set(registry.components):
+                targets |= self.graph.affected_by(name, registry)
+            targets |= self.graph.resolved_by(registry)
+            # A component whose .css/.js appeared or went away
+            targets |= {path.with_suffix(".jinja") for path in changed_assets}
+
+        files = sorted(path for path in targets if path in new)
+        return self.transform(files), deleted_templates
+
+
+# ---------------------------------------------------------------------------
+# Changes since a git revision
+# ---------------------------------------------------------------------------
+
+
+def _git(args: list[str], cwd: Path) -> str:
+    try:
+        out = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True, check=True
+        )
+    except FileNotFoundError as e:
+        raise ValueError("git is not installed") from e
+    except subprocess.CalledProcessError as e:
+        raise ValueError(e.stderr.strip() or f"git {args[0]} failed") from e
+    return out.stdout
+
+
+def git_changed_files(rev: str, cwd: Path) -> dict[Path, str]:
+    """Files changed between `rev` and the work tree of the repository
+    containing `cwd`, including uncommitted and untracked files, mapped to
+    their status: "A" (added), "M" (modified) or "D" (deleted). Renames
+    count as a deletion and an addition. Raises ValueError if git fails."""
+    top = Path(_git(["rev-parse", "--show-toplevel"], cwd).strip())
+    changed: dict[Path, str] = {}
+    fields = _git(["diff", "--name-status", "--no-renames", "-z", rev, "--"], cwd)
+    parts = fields.split("\0")
+    for status, name in zip(parts[0::2], parts[1::2]):
+        changed[(top / name).resolve()] = "M" if status[0] == "T" else status[0]
+    untracked = _git(["ls-files", "--others", "--exclude-standard", "-z"], top)
+    for name in filter(None, untracked.split("\0")):
+        changed[(top / name).resolve()] = "A"
+    return changed
+
+
+def templates_changed_since(
+    changed: dict[Path, str],
+    folders: list[CatalogFolder],
+    registry: ComponentRegistry,
+    graph: UsageGraph | None,
+) -> set[Path]:
+    """Templates to transform after the given file changes: the changed
+    templates, components whose assets were added or removed, and (given
+    a usage graph) the templates that use a component that was added or
+    removed, as their imports change."""
+    templates = set(registry.templates)
+    selected: set[Path] = set()
+    if graph is not None and any(
+        status == "A" and path.suffix == ".jinja" for path, status in changed.items()
+    ):
+        # Tags that matched no component when the graph was recorded
+        selected |= graph.resolved_by(registry)
+    for path, status in changed.items():
+        if path.suffix not in WATCHED_SUFFIXES:
+            continue
+        jinja_file = path.with_suffix(".jinja")
+        if status != "D" and path.suffix == ".jinja" and path in templates:
+            selected.add(path)
+        if status == "M":
+            continue
+        if path.suffix != ".jinja" and jinja_file in templates:
+            selected.add(jinja_file)
+        elif path.suffix == ".jinja" and graph is not None:
+            for folder in folders:
+                root = folder.path.resolve()
+                if path.is_relative_to(root):
+                    name = component_name(path.relative_to(root), folder.prefix)
+                    selected |= graph.affected_by(name, registry)
+                    break
+    return selected & templates
+
+
+# ---------------------------------------------------------------------------
+# Sharding
+# ---------------------------------------------------------------------------
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parse an `I/N` shard argument, with 1 <= I <= N."""
+    index, sep, count = value.partition("/")
+    try:
+        shard = int(index), int(count)
+    except ValueError:
+        shard = (0, 0)
+    if not sep or not 1 <= shard[0] <= shard[1]:
+        raise argparse.ArgumentTypeError(
+            f"invalid shard {value!r}, expected I/N with 1 <= I <= N"
+        )
+    return shard
+
+
+def shard_of(key: str, count: int) -> int:
+    """Stable 0-based shard of a key (unlike hash(), the same on every run
+    and machine)."""
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def select_shard(
+    templates: list[Path],
+    folders: list[CatalogFolder],
+    index: int,
+    count: int,
+) -> list[Path]:
+    """The templates of shard `index` (1-based) of `count`. Templates are
+    keyed by their path inside their catalog folder (and its prefix), so
+    every machine splits a checkout the same way wherever it lives."""
+    roots = [(folder.path.resolve(), folder.prefix) for folder in folders]
+    selected: list[Path] = []
+    for path in sorted(templates):
+        key = path.as_posix()
+        for root, prefix in roots:
+            if path.is_relative_to(root):
+                key = f"{prefix}:{path.relative_to(root).as_posix()}"
+                break
+        if shard_of(key, count) == index - 1:
+            selected.append(path)
+    return selected
+
+
 # ---------------------------------------------------------------------------
 # Backup
 # ---------------------------------------------------------------------------
 
 
+BACKUP_MODES = ("copy", "hardlink", "reflink", "tar")
+
+# ioctl request that makes a file share another's data blocks (Linux:
+# btrfs, XFS, ...); not exposed by the fcntl module.
+FICLONE = 0x40049409
+
+
+def reflink_or_copy(src: Path, dest: Path) -> None:
+    """Clone a file's blocks where the filesystem supports it, else copy."""
+    if fcntl is not None:
+        try:
+            with src.open("rb") as fsrc, dest.open("wb") as fdest:
+                fcntl.ioctl(fdest.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src, dest)
+            return
+        except OSError:
+            dest.unlink(missing_ok=True)
+    shutil.copy2(src, dest)
+
+
+def hardlink_or_copy(src: Path, dest: Path) -> None:
+    """Hardlink a file, or copy it if that is not possible (e.g. across
+    filesystems). Safe for backups because templates are never edited in
+    place: .jx files are new files and .jinja files are only removed."""
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
 def create_backup(
     files: list[Path],
     asset_sources: list[Path],
     backup_dir: Path,
+    mode: str = "copy",
 ) -> Path:
-    """Create timestamped backup of all files that will be modified."""
+    """Create timestamped backup of all files that will be modified.
+
+    `mode` is one of BACKUP_MODES: a folder of copies, hardlinks or reflinks
+    mirroring the files' absolute paths, or a single .tar.gz archive with
+    the same layout. Returns the folder or archive path.
+    """
     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
     backup_path = backup_dir / f"backup-{timestamp}"
+    # Use the absolute path (minus root) to guarantee uniqueness
+    sources = [f.resolve() for f in files + asset_sources if f.exists()]
+    names = [src.relative_to(src.anchor) for src in sources]
+
+    if mode == "tar":
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        backup_path = backup_path.with_name(backup_path.name + ".tar.gz")
+        with tarfile.open(backup_path, "w:gz") as archive:
+            for src, name in zip(sources, names):
+                archive.add(src, arcname=str(name))
+        return backup_path
+
+    clone = {
+        "copy": shutil.copy2,
+        "hardlink": hardlink_or_copy,
+        "reflink": reflink_or_copy,
+    }[mode]
     backup_path.mkdir(parents=True, exist_ok=True)
+    dests = [backup_path / name for name in names]
+    make_dirs(dests)
+    for src, dest in zip(sources, dests):
+        clone(src, dest)
+    return backup_path
 
-    for f in files + asset_sources:
-        if f.exists():
-            # Use the absolute path (minus root) to guarantee uniqueness
-            dest = backup_path / f.resolve().relative_to(f.resolve().anchor)
-            dest.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(f, dest)
 
-    return backup_path
+# ---------------------------------------------------------------------------
+# Journaled apply
+# ---------------------------------------------------------------------------
+
+JOURNAL_NAME = ".jx-migrate-journal.jsonl"
+JOURNAL_VERSION = 2
+STAGED_SUFFIX = ".staged"
+
+
+def _copy_atomic(src: Path, dest: Path) -> None:
+    tmp = dest.with_name(dest.name + ".tmp")
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dest)
+
+
+def _link_atomic(target: Path, dest: Path) -> None:
+    tmp = dest.with_name(dest.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(target, tmp)
+    except OSError:
+        shutil.copy2(target, tmp)
+    os.replace(tmp, dest)
+
+
+def _stash_file(path: Path, stashed: Path) -> None:
+    """Keep a file's current content at `stashed`: a hardlink, as the file
+    is only ever replaced or removed, never written in place; a copy only
+    if the stash is on another filesystem."""
+    stashed.unlink(missing_ok=True)
+    try:
+        os.link(path, stashed)
+    except OSError:
+        shutil.copy2(path, stashed)
+
+
+def _redo_step(step: dict) -> bool:
+    """Carry out a journaled step. Steps are idempotent, so one that may
+    already have (partly) run can be redone. Returns True if a .jinja
+    file was removed."""
+    if step["op"] == "asset":
+        if step.get("link"):
+            _link_atomic(Path(step["src"]), Path(step["dest"]))
+        else:
+            _copy_atomic(Path(step["src"]), Path(step["dest"]))
+        return False
+    jinja, jx = Path(step["jinja"]), Path(step["jx"])
+    if step["output_hash"] is not None:
+        staged = jx.with_name(jx.name + STAGED_SUFFIX)
+        if staged.exists():
+            os.replace(staged, jx)
+        else:
+            written = jx.exists() and hash_text(jx.read_text("utf-8"))
+            if written != step["output_hash"]:
+                raise FileNotFoundError(f"Lost the migrated source staged at {staged}")
+    if step["remove"] and jinja != jx and jinja.exists():
+        jinja.unlink()
+        return True
+    return False
+
+
+def _timed_redo(step: dict) -> tuple[bool, float]:
+    started = time.perf_counter()
+    renamed = _redo_step(step)
+    return renamed, time.perf_counter() - started
+
+
+def _step_path(step: dict) -> str:
+    return step["dest"] if step["op"] == "asset" else step["jinja"]
+
+
+def _make_step_dirs(steps: list[dict]) -> None:
+    make_dirs([Path(step["dest"]) for step in steps if step["op"] == "asset"])
+
+
+class ApplyError(Exception):
+    """Some journaled steps failed. The others were carried out."""
+
+    def __init__(self, failures: list[tuple[str, Exception]]) -> None:
+        self.failures = failures
+        path, error = failures[0]
+        super().__init__(f"{len(failures)} file(s) failed, first {path}: {error}")
+
+
+def _undo_step(step: dict) -> None:
+    """Revert a journaled step, whether or not it finished."""
+    if step["op"] == "asset":
+        dest = Path(step["dest"])
+        if step["previous"] is not None:
+            _link_atomic(Path(step["previous"]), dest)
+        elif dest.exists():
+            dest.unlink()
+        return
+    jinja, jx = Path(step["jinja"]), Path(step["jx"])
+    if step["original"] is not None and not jinja.exists():
+        _link_atomic(Path(step["original"]), jinja)
+    if step["output_hash"] is None:
+        return  # the .jx predates this run
+    jx.with_name(jx.name + STAGED_SUFFIX).unlink(missing_ok=True)
+    if step["previous"] is not None:
+        _link_atomic(Path(step["previous"]), jx)
+    elif jx.exists():
+        jx.unlink()
+
+
+class Journal:
+    """Write-ahead log of the apply phase.
+
+    Every step (writing a template's .jx and removing its .jinja, or copying
+    an asset) is appended and synced to disk before it is carried out, then
+    marked done. An interrupted apply can then be finished (`resume_apply`)
+    or reverted (`rollback_apply`) by going over the journaled steps only.
+
+    Steps only record paths and hashes. A template's migrated source is
+    staged next to its .jx before the step is journaled, and the files a
+    step removes or replaces (.jinja, .jx, assets) are hardlinked into a
+    stash folder next to the journal, so no file content is written twice.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.stash = path.with_name(path.name + ".stash")
+        self._file: TextIO | None = None
+        self._next_id = 0
+        self._outputs: dict[int, str] = {}  # step id -> source to stage
+
+    @staticmethod
+    def read(path: Path) -> tuple[list[dict], set[int], bool]:
+        """Return (steps, ids of the steps done, committed) from a journal.
+        A truncated last line, from a crash while writing it, is ignored."""
+        steps: list[dict] = []
+        done: set[int] = set()
+        committed = False
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                op = record.get("op")
+                if op == "begin" and record.get("version") != JOURNAL_VERSION:
+                    raise ValueError(f"{path} was written by another version")
+                if op in ("template", "asset"):
+                    steps.append(record)
+                elif op == "done":
+                    done.add(record["id"])
+                elif op == "commit":
+                    committed = True
+        return steps, done, committed
+
+    @classmethod
+    def is_pending(cls, path: Path) -> bool:
+        """True if the journal records an apply that did not finish."""
+        try:
+            _, _, committed = cls.read(path)
+        except OSError:
+            return False
+        except ValueError:
+            return True
+        return not committed
+
+    @classmethod
+    def start(cls, path: Path) -> Journal:
+        """Start a new journal, replacing the one of a finished apply."""
+        journal = cls(path)
+        shutil.rmtree(journal.stash, ignore_errors=True)
+        journal._file = path.open("w", encoding="utf-8")
+        journal._append({"op": "begin", "version": JOURNAL_VERSION})
+        journal._sync()
+        return journal
+
+    def _append(self, record: dict) -> None:
+        assert self._file is not None
+        self._file.write(json.dumps(record) + "\n")
+
+    def _sync(self) -> None:
+        assert self._file is not None
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _new_step(self, op: str, **fields: object) -> dict:
+        step = {"op": op, "id": self._next_id, **fields}
+        self._next_id += 1
+        return step
+
+    def _stash(self, step: dict, path: Path) -> str:
+        stashed = self.stash / f"{step['id']}{path.suffix}"
+        self.stash.mkdir(parents=True, exist_ok=True)
+        _stash_file(path, stashed)
+        return str(stashed)
+
+    def _prepare(self, step: dict) -> None:
+        """Save what redoing and undoing the step needs: the migrated source,
+        staged next to the .jx, and the files the step removes or replaces."""
+        if step["op"] == "asset":
+            dest = Path(step["dest"])
+            if dest.exists():
+                step["previous"] = self._stash(step, dest)
+            return
+        jinja, jx = Path(step["jinja"]), Path(step["jx"])
+        if step["remove"]:
+            step["original"] = self._stash(step, jinja)
+        output = self._outputs.pop(step["id"], None)
+        if output is None:
+            return
+        if jx.exists():
+            step["previous"] = self._stash(step, jx)
+        jx.with_name(jx.name + STAGED_SUFFIX).write_text(output, encoding="utf-8")
+        step["output_hash"] = hash_text(output)
+
+    def _run(self, steps: list[dict], threads: int) -> int:
+        """Carry out steps, with up to `threads` at a time. Returns how many
+        .jinja files were removed; raises ApplyError, after the other steps
+        are done, if any failed."""
+        failures: list[tuple[str, Exception]] = []
+        ready: list[dict] = []
+        for step, (_, error) in zip(steps, map_io(self._prepare, steps, threads)):
+            if error is None:
+                ready.append(step)
+            else:
+                failures.append((_step_path(step), error))
+
+        # Every intent reaches the disk before anything is touched. A lost
+        # "done" just means an idempotent step is redone on --resume.
+        for step in ready:
+            self._append(step)
+        self._sync()
+        _make_step_dirs(ready)
+
+        renamed = 0
+        for step, (result, error) in zip(ready, map_io(_timed_redo, ready, threads)):
+            if error is not None:
+                failures.append((_step_path(step), error))
+                continue
+            self._append({"op": "done", "id": step["id"]})
+            step_renamed, seconds = result
+            renamed += step_renamed
+            if step["op"] == "template":
+                emit_phase("3g", seconds, Path(step["jinja"]))
+        self._file.flush()
+
+        if failures:
+            raise ApplyError(failures)
+        return renamed
+
+    def apply_templates(
+        self, changes: list[FileChanges], threads: int = 1, remove: bool = True
+    ) -> int:
+        """Write each template's migrated source to its .jx path and, unless
+        `remove` is False, remove its .jinja file. Templates re-migrated from
+        their .jx are rewritten in place. Returns how many .jinja files were
+        removed."""
+        steps = []
+        for c in changes:
+            jx = c.file_path.with_suffix(".jx")
+            step = self._new_step(
+                "template",
+                jinja=str(c.file_path),
+                jx=str(jx),
+                remove=remove and jx != c.file_path,
+                original=None,
+                output_hash=None,
+                previous=None,
+            )
+            self._outputs[step["id"]] = c.transformed
+            steps.append(step)
+        return self._run(steps, threads)
+
+    def apply_template(self, changes: FileChanges) -> None:
+        """Write a single template's .jx, keeping its .jinja. Used by
+        --stream, which removes the .jinja files with `remove_templates`
+        once every template is written: until then, an interrupted run can
+        be started again from the same sources."""
+        self.apply_templates([changes], remove=False)
+
+    def remove_templates(self, jinja_files: list[Path], threads: int = 1) -> int:
+        """Remove the .jinja of templates whose .jx is already up to date."""
+        steps = [
+            self._new_step(
+                "template",
+                jinja=str(path),
+                jx=str(path.with_suffix(".jx")),
+                remove=True,
+                original=None,
+                output_hash=None,
+                previous=None,
+            )
+            for path in jinja_files
+            if path.suffix == ".jinja" and path.exists()
+        ]
+        return self._run(steps, threads)
+
+    def copy_assets(
+        self, copies: list[tuple[Path, Path]], threads: int = 1, link: bool = False
+    ) -> None:
+        """Copy (or, with link=True, hardlink) (source, destination) pairs."""
+        steps = [
+            self._new_step(
+                "asset", src=str(src), dest=str(dest), previous=None, link=link
+            )
+            for src, dest in copies
+        ]
+        self._run(steps, threads)
+
+    def commit(self) -> None:
+        self._append({"op": "commit"})
+        self._sync()
+        self.close()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def resume_apply(path: Path, threads: int = 1) -> int:
+    """Finish an interrupted apply. Returns the number of steps redone."""
+    steps, done, committed = Journal.read(path)
+    if committed:
+        return 0
+    pending = [step for step in steps if step["id"] not in done]
+    _make_step_dirs(pending)
+    failures: list[tuple[str, Exception]] = []
+    journal = Journal(path)
+    journal._file = path.open("a", encoding="utf-8")
+    try:
+        for step, (_, error) in zip(pending, map_io(_redo_step, pending, threads)):
+            if error is None:
+                journal._append({"op": "done", "id": step["id"]})
+            else:
+                failures.append((_step_path(step), error))
+        if failures:
+            raise ApplyError(failures)
+        journal.commit()
+    finally:
+        journal.close()
+    return len(pending)
+
+
+def rollback_apply(path: Path) -> int:
+    """Revert every journaled step, newest first, then remove the journal.
+    Returns the number of steps reverted."""
+    steps, _, _ = Journal.read(path)
+    for step in reversed(steps):
+        _undo_step(step)
+    path.unlink()
+    shutil.rmtree(Journal(path).stash, ignore_errors=True)
+    return len(steps)
 
 
 # ---------------------------------------------------------------------------
@@ -769,36 +2179,243 @@ def create_backup(
 # ---------------------------------------------------------------------------
 
 
-def print_diff_summary(changes: FileChanges) -> None:
-    """Print a concise summary of changes to a file."""
+DIFF_CONTEXT = 3       # unchanged lines shown around each change
+DIFF_MAX_LINES = 200   # diff lines printed per file (0 for no limit)
+
+# Regions without unique lines larger than this (len(a) * len(b)) are not
+# handed to difflib, whose matcher is quadratic.
+_DIFF_SMALL_REGION = 250_000
+
+Opcode = tuple[str, int, int, int, int]
+
+
+def _unique_anchors(
+    a: list[str], b: list[str], alo: int, ahi: int, blo: int, bhi: int
+) -> list[tuple[int, int]]:
+    """Pairs of lines that appear exactly once in both regions, reduced to
+    the longest run that is in order on both sides (patience diff)."""
+    counts: dict[str, int] = {}
+    for i in range(alo, ahi):
+        counts[a[i]] = counts.get(a[i], 0) + 1
+    in_b: dict[str, int] = {}
+    for j in range(blo, bhi):
+        line = b[j]
+        if counts.get(line) == 1:
+            in_b[line] = -1 if line in in_b else j
+    pairs = [
+        (i, in_b[a[i]])
+        for i in range(alo, ahi)
+        if in_b.get(a[i], -1) >= 0 and counts[a[i]] == 1
+    ]
+    if not pairs:
+        return []
+
+    # Longest increasing subsequence of the b indexes
+    tails: list[int] = []       # smallest b index ending a run of each length
+    tail_at: list[int] = []     # pair index of that tail
+    parent: list[int] = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_at.append(k)
+        else:
+            tails[pos] = j
+            tail_at[pos] = k
+        parent[k] = tail_at[pos - 1] if pos else -1
+    anchors: list[tuple[int, int]] = []
+    k = tail_at[-1]
+    while k != -1:
+        anchors.append(pairs[k])
+        k = parent[k]
+    anchors.reverse()
+    return anchors
+
+
+def _aligned_matches(
+    a: list[str], b: list[str], alo: int, ahi: int, blo: int, bhi: int
+) -> list[tuple[int, int, int]]:
+    """Match a region line by line, aligned at its start or at its end
+    (whichever matches more lines). This covers lines edited in place plus
+    lines inserted or removed at one end, such as a new import header."""
+    size = min(ahi - alo, bhi - blo)
+    best: list[tuple[int, int, int]] = []
+    best_count = -1
+    for i0, j0 in ((alo, blo), (ahi - size, bhi - size)):
+        runs: list[tuple[int, int, int]] = []
+        count = 0
+        run = 0
+        for k in range(size + 1):
+            if k < size and a[i0 + k] == b[j0 + k]:
+                run += 1
+                continue
+            if run:
+                runs.append((i0 + k - run, j0 + k - run, run))
+                count += run
+                run = 0
+        if count > best_count:
+            best, best_count = runs, count
+    return best
+
+
+def diff_opcodes(a: list[str], b: list[str]) -> list[Opcode]:
+    """Compute line diff opcodes, in the format of
+    `difflib.SequenceMatcher.get_opcodes`, in roughly linear time.
+
+    Common prefixes and suffixes are trimmed, lines unique to both sides
+    anchor the rest (patience diff), and regions without anchors use difflib
+    when small or a line-by-line alignment otherwise.
+    """
+    matches: list[tuple[int, int, int]] = []
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        alo, ahi, blo, bhi = regions.pop()
+        n = 0
+        while alo + n < ahi and blo + n < bhi and a[alo + n] == b[blo + n]:
+            n += 1
+        if n:
+            matches.append((alo, blo, n))
+            alo += n
+            blo += n
+        n = 0
+        while ahi - n > alo and bhi - n > blo and a[ahi - n - 1] == b[bhi - n - 1]:
+            n += 1
+        if n:
+            matches.append((ahi - n, bhi - n, n))
+            ahi -= n
+            bhi -= n
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+        if anchors:
+            i, j = alo, blo
+            for ai, bj in anchors:
+                matches.append((ai, bj, 1))
+                regions.append((i, ai, j, bj))
+                i, j = ai + 1, bj + 1
+            regions.append((i, ahi, j, bhi))
+        elif (ahi - alo) * (bhi - blo) <= _DIFF_SMALL_REGION:
+            matcher = difflib.SequenceMatcher(
+                None, a[alo:ahi], b[blo:bhi], autojunk=False
+            )
+            for i, j, size in matcher.get_matching_blocks():
+                if size:
+                    matches.append((alo + i, blo + j, size))
+        else:
+            matches.extend(_aligned_matches(a, b, alo, ahi, blo, bhi))
+
+    opcodes: list[Opcode] = []
+    i = j = 0
+    for ai, bj, size in sorted(matches) + [(len(a), len(b), 0)]:
+        if i < ai and j < bj:
+            opcodes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, ai, j, bj))
+        if size:
+            if opcodes and opcodes[-1][0] == "equal":
+                _, i1, _, j1, _ = opcodes.pop()
+                opcodes.append(("equal", i1, ai + size, j1, bj + size))
+            else:
+                opcodes.append(("equal", ai, ai + size, bj, bj + size))
+        i, j = ai + size, bj + size
+    return opcodes
+
+
+def _format_range(start: int, stop: int) -> str:
+    length = stop - start
+    if length == 1:
+        return str(start + 1)
+    return f"{start + 1 if length else start},{length}"
+
+
+def unified_diff(
+    old_lines: list[str], new_lines: list[str], context: int = DIFF_CONTEXT
+) -> Iterator[str]:
+    """Yield the hunks of a unified diff (without the file header lines)."""
+    codes = diff_opcodes(old_lines, new_lines)
+    if not codes or all(code[0] == "equal" for code in codes):
+        return
+
+    # Group changes with their context, as difflib.get_grouped_opcodes does
+    groups: list[list[Opcode]] = []
+    group: list[Opcode] = []
+    last = len(codes) - 1
+    for idx, (tag, i1, i2, j1, j2) in enumerate(codes):
+        if tag == "equal":
+            if idx == 0:
+                i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+            if idx == last:
+                i2, j2 = min(i2, i1 + context), min(j2, j1 + context)
+            if i2 - i1 > 2 * context and 0 < idx < last:
+                group.append((tag, i1, i1 + context, j1, j1 + context))
+                groups.append(group)
+                group = []
+                i1, j1 = i2 - context, j2 - context
+        group.append((tag, i1, i2, j1, j2))
+    if group:
+        groups.append(group)
+
+    for group in groups:
+        first, final = group[0], group[-1]
+        old_range = _format_range(first[1], final[2])
+        new_range = _format_range(first[3], final[4])
+        yield f"@@ -{old_range} +{new_range} @@"
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in old_lines[i1:i2]:
+                    yield f" {line.rstrip()}"
+                continue
+            for line in old_lines[i1:i2]:
+                yield f"-{line.rstrip()}"
+            for line in new_lines[j1:j2]:
+                yield f"+{line.rstrip()}"
+
+
+def print_diff_summary(
+    changes: FileChanges,
+    context: int = DIFF_CONTEXT,
+    max_lines: int = DIFF_MAX_LINES,
+) -> None:
+    """Print a unified diff of the changes to a file, cut after
+    `max_lines` lines (0 for no limit)."""
     if not changes.changed:
         return
 
     print(f"\n  --- {changes.file_path} ---")
 
-    old_lines = changes.original.splitlines(keepends=True)
-    new_lines = changes.transformed.splitlines(keepends=True)
-
-    # Show added/removed lines (simple diff)
-    old_set = set(old_lines)
-    new_set = set(new_lines)
-
-    for line in new_lines:
-        if line not in old_set:
-            print(f"    + {line.rstrip()}")
-    for line in old_lines:
-        if line not in new_set:
-            print(f"    - {line.rstrip()}")
+    old_lines = changes.original.splitlines()
+    new_lines = changes.transformed.splitlines()
+    printed = 0
+    hidden = 0
+    for line in unified_diff(old_lines, new_lines, context):
+        if max_lines and printed >= max_lines:
+            hidden += 1
+            continue
+        print(f"    {line}")
+        printed += 1
+    if hidden:
+        print(f"    ... {hidden} more diff line(s) not shown")
 
     for w in changes.warnings:
         print(f"    ! WARNING: {w}")
 
 
-def print_report(result: MigrationResult) -> None:
-    """Print the full migration report."""
-    changed = [c for c in result.file_changes if c.changed]
+def print_report(
+    result: MigrationResult,
+    context: int = DIFF_CONTEXT,
+    max_lines: int = DIFF_MAX_LINES,
+) -> None:
+    """Print the full migration report.
+
+    Diffs are printed for the files kept in `result.file_changes`; totals
+    come from the counters gathered while the templates were transformed.
+    """
+    modified = result.templates_modified
 
-    if not changed and not result.asset_copies and not result.file_changes:
+    if not modified and not result.asset_copies and not result.summaries:
         print("\nNo changes needed.")
         return
 
@@ -806,14 +2423,26 @@ def print_report(result: MigrationResult) -> None:
     print("MIGRATION REPORT")
     print(f"{'='*60}")
 
-    if changed:
-        print(f"\nTemplates to modify: {len(changed)}")
-        for c in changed:
-            print_diff_summary(c)
+    if modified:
+        print(f"\nTemplates to modify: {modified}")
+        for c in result.file_changes:
+            print_diff_summary(c, context, max_lines)
 
     if result.asset_copies:
+        conflicts = set(result.asset_conflicts)
         print(f"\nAssets to copy: {len(result.asset_copies)}")
         for src, dest in result.asset_copies:
+            note = "  (replaces a different file)" if (src, dest) in conflicts else ""
+            print(f"    {src} -> {dest}{note}")
+
+    if result.asset_links:
+        print(f"\nAssets to hardlink (same content): {len(result.asset_links)}")
+        for target, dest in result.asset_links:
+            print(f"    {dest} => {target}")
+
+    if result.asset_unchanged:
+        print(f"\nAssets already up to date: {len(result.asset_unchanged)}")
+        for src, dest in result.asset_unchanged:
             print(f"    {src} -> {dest}")
 
     if result.warnings:
@@ -821,38 +2450,169 @@ def print_report(result: MigrationResult) -> None:
         for w in result.warnings:
             print(f"    ! {w}")
 
-    # Summary stats
-    imports_added = 0
-    slots_migrated = 0
-    fills_migrated = 0
-    asset_calls_migrated = 0
-    for c in changed:
-        new = c.transformed
-        old = c.original
-        imports_added += len(RX_EXISTING_IMPORT.findall(new)) - len(
-            RX_EXISTING_IMPORT.findall(old)
-        )
-        # Count slot/fill changes
-        slots_migrated += new.count("{% slot ") - old.count("{% slot ")
-        fills_migrated += new.count("{% fill ") - old.count("{% fill ")
-        asset_calls_migrated += old.count("catalog.render_assets()") - new.count(
-            "catalog.render_assets()"
-        )
-
-    total_files = len(result.file_changes)
+    stats = result.stats
     print(f"\n{'='*60}")
     print("SUMMARY")
     print(f"{'='*60}")
-    print(f"  Templates modified:        {len(changed)}")
-    print(f"  Templates to rename .jx:   {total_files}")
-    print(f"  Import statements added:   {imports_added}")
-    print(f"  Slot definitions migrated: {slots_migrated}")
-    print(f"  Fill blocks generated:     {fills_migrated}")
-    print(f"  Asset calls migrated:      {asset_calls_migrated}")
+    print(f"  Templates modified:        {modified}")
+    print(f"  Templates to rename .jx:   {len(result.summaries)}")
+    print(f"  Import statements added:   {stats.imports_added}")
+    print(f"  Slot definitions migrated: {stats.slots_migrated}")
+    print(f"  Fill blocks generated:     {stats.fills_migrated}")
+    print(f"  Asset calls migrated:      {stats.asset_calls_migrated}")
     print(f"  Asset files to copy:       {len(result.asset_copies)}")
+    print(f"  Asset files unchanged:     {len(result.asset_unchanged)}")
+    print(f"  Asset files conflicting:   {len(result.asset_conflicts)}")
+    if result.asset_links:
+        print(
+            f"  Asset files to hardlink:   {len(result.asset_links)} "
+            f"({result.asset_bytes_saved} bytes saved)"
+        )
     print()
 
 
+class JsonlReport:
+    """Machine-readable report: one JSON object per line, written as each
+    template is processed and ended by a summary record."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self.started = time.perf_counter()
+
+    def _write(self, record: dict) -> None:
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+    def file(self, changes: FileChanges) -> None:
+        self._write({
+            "type": "file",
+            "path": str(changes.file_path),
+            "changed": changes.changed,
+            **asdict(changes.stats),
+            "warnings": changes.warnings,
+            "seconds": round(changes.seconds, 6),
+            "timings": {
+                name: round(seconds, 6) for name, seconds in changes.timings.items()
+            },
+        })
+
+    def assets(self, result: MigrationResult) -> None:
+        """One record per planned asset: copied (possibly replacing a
+        different file), hardlinked to an identical copy, or unchanged."""
+        conflicts = set(result.asset_conflicts)
+        for action, pairs in (
+            ("copy", result.asset_copies),
+            ("link", result.asset_links),
+            ("unchanged", result.asset_unchanged),
+        ):
+            for src, dest in pairs:
+                self._write({
+                    "type": "asset",
+                    "action": action,
+                    "src": str(src),
+                    "dest": str(dest),
+                    "conflict": (src, dest) in conflicts,
+                })
+
+    def summary(self, result: MigrationResult, seconds: float | None = None) -> None:
+        if seconds is None:
+            seconds = time.perf_counter() - self.started
+        self._write({
+            "type": "summary",
+            "templates": len(result.summaries),
+            "templates_modified": result.templates_modified,
+            **asdict(result.stats),
+            "asset_copies": len(result.asset_copies),
+            "asset_links": len(result.asset_links),
+            "asset_bytes_saved": result.asset_bytes_saved,
+            "asset_unchanged": len(result.asset_unchanged),
+            "asset_conflicts": len(result.asset_conflicts),
+            "warnings": len(result.warnings),
+            "seconds": round(seconds, 6),
+        })
+
+
+def merge_reports(paths: list[Path]) -> tuple[MigrationResult, float]:
+    """Combine jsonl reports, e.g. from the shards of a --shard run, into
+    one result. Returns (result, seconds), the seconds being those of the
+    slowest report. Raises ValueError if a report is unreadable or a
+    template appears in more than one."""
+    result = MigrationResult()
+    seen: set[str] = set()
+    seconds = 0.0
+    stat_names = [f.name for f in fields(ChangeStats)]
+    for path in paths:
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+            records = [json.loads(line) for line in lines if line.strip()]
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read {path}: {e}") from e
+        for record in records:
+            kind = record.get("type")
+            if kind == "file":
+                if record["path"] in seen:
+                    raise ValueError(
+                        f"{record['path']} appears in more than one report"
+                    )
+                seen.add(record["path"])
+                file_path = Path(record["path"])
+                stats = ChangeStats(**{name: record[name] for name in stat_names})
+                result.summaries.append(
+                    FileSummary(file_path, record["changed"], stats)
+                )
+                if record["changed"]:
+                    result.stats.add(stats)
+                result.warnings.extend(
+                    f"{file_path.name}: {w}" for w in record["warnings"]
+                )
+            elif kind == "asset":
+                pair = (Path(record["src"]), Path(record["dest"]))
+                if record["action"] == "link":
+                    result.asset_links.append(pair)
+                elif record["action"] == "unchanged":
+                    result.asset_unchanged.append(pair)
+                else:
+                    result.asset_copies.append(pair)
+                    if record["conflict"]:
+                        result.asset_conflicts.append(pair)
+            elif kind == "summary":
+                result.asset_bytes_saved += record.get("asset_bytes_saved", 0)
+                seconds = max(seconds, record.get("seconds", 0.0))
+    return result, seconds
+
+
+class PhaseProfile:
+    """Phase hook that adds up wall time and call counts per phase and
+    wall time per template."""
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        self.per_file: dict[Path, float] = {}
+
+    def __call__(self, name: str, seconds: float, file_path: Path | None) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if file_path is not None:
+            self.per_file[file_path] = self.per_file.get(file_path, 0.0) + seconds
+
+    def slowest(self, top: int) -> list[tuple[Path, float]]:
+        ranked = sorted(self.per_file.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:top]
+
+    def print_summary(self, top: int, out: TextIO | None = None) -> None:
+        print("\n" + "=" * 60, file=out)
+        print("  PROFILE", file=out)
+        print("=" * 60, file=out)
+        print(f"\n  {'phase':<10} {'calls':>8} {'seconds':>10}", file=out)
+        for name, seconds in self.seconds.items():
+            print(f"  {name:<10} {self.calls[name]:>8} {seconds:>10.4f}", file=out)
+        if self.per_file and top > 0:
+            print(f"\n  Slowest {min(top, len(self.per_file))} template(s):", file=out)
+            for file_path, seconds in self.slowest(top):
+                print(f"  {seconds:>10.4f}  {file_path}", file=out)
+
+
 # ---------------------------------------------------------------------------
 # Interactive prompts
 # ---------------------------------------------------------------------------
@@ -900,7 +2660,10 @@ def prompt_static_folder() -> Path:
 def prompt_url_prefix() -> str:
     """Ask for the asset URL prefix."""
     print("\nStep 3: Configure asset URL prefix")
-    prefix = input("  URL prefix [/static/]: ").strip()
+    return normalize_url_prefix(input("  URL prefix [/static/]: ").strip())
+
+
+def normalize_url_prefix(prefix: str) -> str:
     if not prefix:
         prefix = "/static/"
     # Ensure trailing slash
@@ -909,14 +2672,215 @@ def prompt_url_prefix() -> str:
     return prefix
 
 
+# ---------------------------------------------------------------------------
+# Non-interactive configuration
+# ---------------------------------------------------------------------------
+
+CONFIG_NAME = "jx-migrate.toml"
+
+
+@dataclass
+class MigrationConfig:
+    """Answers to the interactive prompts; whatever is missing is asked for."""
+    folders: list[CatalogFolder] = field(default_factory=list)
+    static_folder: Path | None = None
+    url_prefix: str | None = None
+
+
+def parse_folder_arg(value: str) -> CatalogFolder:
+    """Parse a `PATH[:PREFIX]` folder argument."""
+    path, sep, prefix = value.rpartition(":")
+    # A colon that is part of the path (e.g. a Windows drive) is not a prefix
+    if not sep or not path or "/" in prefix or "\\" in prefix:
+        path, prefix = value, ""
+    return CatalogFolder(path=Path(path).resolve(), prefix=prefix.strip())
+
+
+def load_config(path: Path) -> MigrationConfig:
+    """Read a jx-migrate.toml file. Relative paths are relative to the file.
+
+        static = "static"
+        url_prefix = "/static/"
+
+        [[folders]]
+        path = "components"
+        prefix = ""
+
+    Raises ValueError if the file cannot be read or is invalid.
+    """
+    if tomllib is None:
+        raise ValueError(f"Reading {path} requires Python 3.11 or newer")
+    try:
+        with path.open("rb") as f:
+            data = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise ValueError(f"Cannot read {path}: {e}") from e
+
+    base = path.resolve().parent
+    config = MigrationConfig()
+    for entry in data.get("folders", []):
+        folder_path = entry.get("path") if isinstance(entry, dict) else None
+        if not folder_path or not isinstance(folder_path, str):
+            raise ValueError(f"{path}: each [[folders]] entry needs a 'path'")
+        config.folders.append(CatalogFolder(
+            path=(base / folder_path).resolve(),
+            prefix=str(entry.get("prefix", "")).strip(),
+        ))
+    if "static" in data:
+        config.static_folder = (base / str(data["static"])).resolve()
+    if "url_prefix" in data:
+        config.url_prefix = normalize_url_prefix(str(data["url_prefix"]).strip())
+    return config
+
+
+def resolve_config(args: argparse.Namespace) -> MigrationConfig:
+    """Merge the config file with the command line; flags win.
+    Raises ValueError if a given value is invalid."""
+    config_path = args.config
+    if config_path is None and Path(CONFIG_NAME).is_file():
+        config_path = Path(CONFIG_NAME)
+    config = load_config(config_path) if config_path else MigrationConfig()
+
+    if args.folder:
+        config.folders = [parse_folder_arg(value) for value in args.folder]
+    if args.static:
+        config.static_folder = Path(args.static).resolve()
+    if args.url_prefix is not None:
+        config.url_prefix = normalize_url_prefix(args.url_prefix.strip())
+
+    for folder in config.folders:
+        if not folder.path.is_dir():
+            raise ValueError(f"'{folder.path}' is not a valid directory")
+    static = config.static_folder
+    if static is not None and static.exists() and not static.is_dir():
+        raise ValueError(f"'{static}' exists but is not a directory")
+    return config
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
 
+def confirm_apply() -> bool:
+    answer = input("Apply changes? (y/n): ").strip().lower()
+    if answer != "y":
+        print("Aborted.")
+        return False
+    return True
+
+
+def watch(args: argparse.Namespace, watcher: Watcher) -> None:
+    """Handle --watch: keep each template's .jx in sync with its .jinja
+    (or, with --dry-run, only show the changes) until interrupted."""
+    def write(results: list[FileChanges], deleted: list[Path]) -> None:
+        if args.dry_run:
+            return
+        for changes in results:
+            write_text_atomic(changes.file_path.with_suffix(".jx"), changes.transformed)
+        for path in deleted:
+            path.with_suffix(".jx").unlink(missing_ok=True)
+
+    results = watcher.prime()
+    write(results, [])
+    print(f"\nTransformed {len(results)} template(s).")
+    print(
+        f"Watching {len(watcher.folders)} folder(s) for changes every "
+        f"{args.watch_interval:g}s (Ctrl+C to stop)..."
+    )
+    try:
+        while True:
+            time.sleep(args.watch_interval)
+            results, deleted = watcher.poll()
+            if not results and not deleted:
+                continue
+            print(f"\n[{datetime.now():%H:%M:%S}] {len(results)} template(s) updated")
+            for path in deleted:
+                print(f"  Deleted {path}")
+            for changes in results:
+                print_diff_summary(changes, args.context, args.max_diff_lines)
+                if not changes.changed:
+                    # print_diff_summary only shows changed templates
+                    for w in changes.warnings:
+                        print(f"    ! {w}")
+            write(results, deleted)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def recover(journal_path: Path, rollback: bool, threads: int) -> None:
+    """Handle --resume and --rollback."""
+    if not journal_path.exists():
+        sys.exit(f"No journal found at {journal_path}")
+    try:
+        if rollback:
+            count = rollback_apply(journal_path)
+            print(f"Reverted {count} step(s) from {journal_path}")
+        else:
+            count = resume_apply(journal_path, threads)
+            print(f"Finished {count} remaining step(s) from {journal_path}")
+    except ApplyError as e:
+        print_apply_failures(e)
+        sys.exit(f"Cannot finish the apply from {journal_path}")
+    except (OSError, ValueError, KeyError) as e:
+        sys.exit(f"Cannot recover from {journal_path}: {e}")
+
+
+def print_apply_failures(error: ApplyError) -> None:
+    print(f"\n  {len(error.failures)} file(s) could not be written:")
+    for path, failure in error.failures:
+        print(f"    {path}: {failure}")
+
+
+def backup_before_apply(
+    files: list[Path], asset_copies: list[tuple[Path, Path]], mode: str
+) -> None:
+    script_dir = Path(__file__).resolve().parent
+    asset_srcs = [src for src, _ in asset_copies]
+    with timed_phase("backup"):
+        backup_path = create_backup(
+            files, asset_srcs, script_dir / "backups", mode
+        )
+    print(f"\n  Backup created: {backup_path}")
+
+
+def merge_reports_main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="migrate.py merge-reports",
+        description="Combine the jsonl reports of several runs (e.g. the "
+        "shards of a --shard run) into one report.",
+    )
+    parser.add_argument("reports", nargs="+", type=Path, metavar="REPORT")
+    parser.add_argument(
+        "--report-format",
+        choices=["text", "jsonl"],
+        default="text",
+        help="'text' (default) prints a summary; 'jsonl' writes the merged "
+        "asset and summary records.",
+    )
+    args = parser.parse_args(argv)
+    try:
+        result, seconds = merge_reports(args.reports)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.report_format == "jsonl":
+        report = JsonlReport(sys.stdout)
+        report.assets(result)
+        report.summary(result, seconds)
+    else:
+        print(f"Merged {len(args.reports)} report(s)")
+        print_report(result)
+
+
 def main() -> None:
+    if sys.argv[1:2] == ["merge-reports"]:
+        merge_reports_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
-        description="Migrate JinjaX templates to Jx syntax."
+        description="Migrate JinjaX templates to Jx syntax.",
+        epilog="Run 'migrate.py merge-reports REPORT...' to combine jsonl "
+        "reports, e.g. from --shard runs.",
     )
     parser.add_argument(
         "--dry-run",
@@ -928,23 +2892,271 @@ def main() -> None:
         action="store_true",
         help="Skip creating backups before modifying files.",
     )
+    parser.add_argument(
+        "--backup-mode",
+        choices=BACKUP_MODES,
+        default="copy",
+        help="'copy' (default) copies every file; 'hardlink' links them "
+        "instead; 'reflink' clones them on filesystems that support it "
+        "(copies elsewhere); 'tar' writes a single .tar.gz archive.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help="Number of processes used to transform templates "
+        "(default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip templates already migrated with the same input and "
+        f"components, as recorded in the manifest ({MANIFEST_NAME}).",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=Path(MANIFEST_NAME),
+        metavar="PATH",
+        help=f"Manifest file used by --incremental (default: ./{MANIFEST_NAME}). "
+        f"The component usage graph is saved next to it as {USAGE_GRAPH_NAME}.",
+    )
+    parser.add_argument(
+        "--only-affected-by",
+        metavar="COMPONENT",
+        help="Only transform the templates that use COMPONENT (e.g. "
+        "common.Form), according to the usage graph saved by a previous "
+        "--incremental run.",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REV",
+        help="Only transform the templates changed since the git revision "
+        "REV (committed, uncommitted or untracked), plus the ones using "
+        "components added or removed since then (according to the usage "
+        "graph).",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="Only transform shard I of N (1-based) of the templates, split "
+        "by a stable hash of their paths; combine the shards' jsonl reports "
+        "with the merge-reports command. Assets are handled by shard 1.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Report and write each template as soon as it is transformed, "
+        "keeping only per-file summaries in memory. Changes are confirmed "
+        "before templates are analyzed instead of after the report.",
+    )
+    parser.add_argument(
+        "--context",
+        type=int,
+        default=DIFF_CONTEXT,
+        metavar="N",
+        help=f"Unchanged lines shown around each change (default: {DIFF_CONTEXT}).",
+    )
+    parser.add_argument(
+        "--max-diff-lines",
+        type=int,
+        default=DIFF_MAX_LINES,
+        metavar="N",
+        help="Diff lines shown per template, 0 for no limit "
+        f"(default: {DIFF_MAX_LINES}).",
+    )
+    parser.add_argument(
+        "--report-format",
+        choices=["text", "jsonl"],
+        default="text",
+        help="'text' (default) prints diffs and a summary; 'jsonl' writes one "
+        "JSON record per template as it is processed, then a summary record.",
+    )
+    parser.add_argument(
+        "--report-file",
+        type=Path,
+        metavar="PATH",
+        help="Write the jsonl report to PATH instead of stdout.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running: transform every template, then transform again "
+        "the ones that change (and the ones using components that are added "
+        "or removed), writing each .jx next to its .jinja, which is kept.",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=DEFAULT_WATCH_INTERVAL,
+        metavar="SECONDS",
+        help=f"How often --watch checks for changes (default: "
+        f"{DEFAULT_WATCH_INTERVAL:g}).",
+    )
+    parser.add_argument(
+        "--config",
+        type=Path,
+        metavar="PATH",
+        help=f"Read folders, static folder and URL prefix from a TOML file "
+        f"(default: ./{CONFIG_NAME} if it exists).",
+    )
+    parser.add_argument(
+        "--folder",
+        action="append",
+        metavar="PATH[:PREFIX]",
+        help="Component folder, with an optional prefix. Repeat for several "
+        "folders; replaces the folders of the config file.",
+    )
+    parser.add_argument(
+        "--static",
+        metavar="PATH",
+        help="Static folder the component assets are copied to.",
+    )
+    parser.add_argument(
+        "--url-prefix",
+        metavar="PREFIX",
+        help="URL prefix the static folder is served at (e.g. /static/).",
+    )
+    parser.add_argument(
+        "--yes",
+        "-y",
+        action="store_true",
+        help="Apply the changes without asking for confirmation.",
+    )
+    parser.add_argument(
+        "--dedupe-assets",
+        action="store_true",
+        help="Copy assets with identical content only once and hardlink the "
+        "other destinations to that copy.",
+    )
+    parser.add_argument(
+        "--journal",
+        type=Path,
+        default=Path(JOURNAL_NAME),
+        metavar="PATH",
+        help=f"Journal of the apply phase, used by --resume and --rollback "
+        f"(default: ./{JOURNAL_NAME}).",
+    )
+    recovery = parser.add_mutually_exclusive_group()
+    recovery.add_argument(
+        "--resume",
+        action="store_true",
+        help="Finish an interrupted apply from its journal and exit.",
+    )
+    recovery.add_argument(
+        "--rollback",
+        action="store_true",
+        help="Revert the last apply (finished or not) from its journal and exit.",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=DEFAULT_IO_THREADS,
+        metavar="N",
+        help="Threads writing templates and copying assets during the apply "
+        f"(default: {DEFAULT_IO_THREADS}).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print wall time and call counts per phase and the slowest "
+        "templates at the end of the run.",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="Number of slowest templates listed by --profile (default: 10).",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=Path,
+        metavar="PATH",
+        help="Run under cProfile and save the stats to PATH (readable with "
+        "pstats). Only the main process is profiled; use --jobs 1 to include "
+        "the template transforms.",
+    )
     args = parser.parse_args()
-
+    if args.resume or args.rollback:
+        recover(args.journal, args.rollback, args.io_threads)
+        return
+    if args.since and args.only_affected_by:
+        parser.error("--since and --only-affected-by cannot be combined")
+    if not args.dry_run and Journal.is_pending(args.journal):
+        parser.error(
+            f"{args.journal} records an interrupted apply; "
+            "finish it with --resume or revert it with --rollback first"
+        )
+    try:
+        config = resolve_config(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Keep a jsonl report on stdout parseable: progress, prompts and the
+    # profile summary go to stderr instead.
+    report_stream = sys.stdout
+    jsonl_stdout = args.report_format == "jsonl" and not args.report_file
+    profile = PhaseProfile() if args.profile else None
+    if profile is not None:
+        add_phase_hook(profile)
+    with redirect_stdout(sys.stderr) if jsonl_stdout else nullcontext():
+        try:
+            if args.profile_output:
+                profiler = cProfile.Profile()
+                try:
+                    profiler.runcall(run, args, config, report_stream)
+                finally:
+                    profiler.dump_stats(args.profile_output)
+            else:
+                run(args, config, report_stream)
+        except ApplyError as e:
+            print_apply_failures(e)
+            sys.exit(
+                f"\nThe apply did not finish. Fix the errors and run with "
+                f"--resume, or undo it with --rollback ({args.journal})."
+            )
+        finally:
+            if profile is not None:
+                remove_phase_hook(profile)
+                profile.print_summary(args.profile_top)
+
+
+def run(
+    args: argparse.Namespace,
+    config: MigrationConfig,
+    report_stream: TextIO | None = None,
+) -> None:
+    """Run the migration. A jsonl report without --report-file is written
+    to `report_stream` (default: stdout)."""
     print("=" * 60)
     print("  JinjaX -> Jx Migration Tool")
     print("=" * 60)
 
     # Gather configuration
-    folders = prompt_catalog_folders()
-    static_folder = prompt_static_folder()
-    url_prefix = prompt_url_prefix()
+    folders = config.folders or prompt_catalog_folders()
+    static_folder = config.static_folder or prompt_static_folder()
+    url_prefix = config.url_prefix or prompt_url_prefix()
+
+    # Templates an earlier --incremental run already renamed to .jx are
+    # still components: register them so imports of them keep resolving.
+    manifest: Manifest | None = None
+    migrated: list[Path] = []
+    if args.incremental or args.only_affected_by:
+        manifest = Manifest.load(args.manifest.resolve())
+        migrated = manifest.migrated()
+        if not args.incremental:
+            manifest = None
 
     # Phase 1: Build component registry
     print("\nStep 4: Scanning components...")
     registry = ComponentRegistry()
     total = 0
     for folder in folders:
-        count = registry.add_folder(folder)
+        with timed_phase("1"):
+            count = registry.add_folder(folder, migrated)
         label = f" (prefix: {folder.prefix})" if folder.prefix else " (no prefix)"
         print(f"  Found {count} components in {folder.path}{label}")
         total += count
@@ -954,73 +3166,225 @@ def main() -> None:
         print("\nNo components found. Nothing to migrate.")
         return
 
+    if args.watch:
+        watch(args, Watcher(folders, registry, url_prefix, args.jobs))
+        return
+
     # Phase 2: Plan asset copies
-    asset_copies = plan_asset_copies(registry, static_folder, url_prefix)
+    asset_links: list[tuple[Path, Path]] = []
+    bytes_saved = 0
+    with timed_phase("2"):
+        asset_copies = plan_asset_copies(registry, static_folder, url_prefix)
+        if args.shard and args.shard[0] != 1:
+            asset_copies = []  # assets are handled by the first shard
+        asset_copies, asset_unchanged, asset_conflicts = compare_asset_copies(
+            asset_copies
+        )
+        if args.dedupe_assets:
+            asset_copies, asset_links, bytes_saved = dedupe_asset_copies(
+                asset_copies
+            )
 
     # Phase 3: Transform templates
     print("\nStep 5: Analyzing templates...")
-    result = MigrationResult(asset_copies=asset_copies)
+    result = MigrationResult(
+        asset_copies=asset_copies,
+        asset_links=asset_links,
+        asset_bytes_saved=bytes_saved,
+        asset_unchanged=asset_unchanged,
+        asset_conflicts=asset_conflicts,
+    )
 
-    # Collect all .jinja files from all catalog folders
-    all_jinja_files: list[Path] = []
-    for folder in folders:
-        all_jinja_files.extend(sorted(folder.path.resolve().rglob("*.jinja")))
+    # All .jinja files from all catalog folders, as found by Phase 1
+    templates = registry.templates
+    graph_path = args.manifest.resolve().with_name(USAGE_GRAPH_NAME)
+    graph: UsageGraph | None = None
+    if args.only_affected_by:
+        graph = UsageGraph.load(graph_path)
+        if graph is None:
+            print(
+                f"\nNo usage graph found at {graph_path}. "
+                "Run once with --incremental to build it."
+            )
+            return
+        affected = graph.affected_by(args.only_affected_by, registry)
+        # Dependents an earlier run already renamed are re-migrated from
+        # their .jx
+        templates = [t for t in templates if t in affected] + [
+            t.with_suffix(".jx") for t in migrated if t in affected
+        ]
+        print(f"  {len(templates)} template(s) use {args.only_affected_by}")
+    elif args.since:
+        graph = UsageGraph.load(graph_path)
+        if graph is None:
+            print(
+                f"\n  No usage graph found at {graph_path}; templates using "
+                "added or removed components cannot be found. Run once with "
+                "--incremental to build it."
+            )
+        try:
+            changed = git_changed_files(args.since, folders[0].path.resolve())
+        except ValueError as e:
+            print(f"\nCannot list the files changed since {args.since}: {e}")
+            return
+        selected = templates_changed_since(changed, folders, registry, graph)
+        templates = [t for t in templates if t in selected]
+        print(f"  {len(templates)} template(s) affected by changes since {args.since}")
+        if args.incremental and graph is None:
+            graph = UsageGraph()
+    elif args.incremental:
+        graph = UsageGraph.load(graph_path) or UsageGraph()
+    if args.shard:
+        index, count = args.shard
+        templates = select_shard(templates, folders, index, count)
+        print(f"  Shard {index}/{count}: {len(templates)} template(s)")
+    fingerprint = ""
+    up_to_date: list[Path] = []
+    if manifest is not None:
+        fingerprint = registry_fingerprint(registry, url_prefix)
+        candidates, templates = templates, []
+        for jinja_file in candidates:
+            if manifest.is_up_to_date(jinja_file, fingerprint):
+                up_to_date.append(jinja_file)
+            else:
+                templates.append(jinja_file)
+        print(
+            f"  Skipping {len(up_to_date)} up-to-date template(s); "
+            f"{len(migrated)} already migrated to .jx"
+        )
 
-    for jinja_file in all_jinja_files:
-        changes = transform_file(jinja_file, registry, url_prefix)
-        result.file_changes.append(changes)
-        if changes.warnings:
-            result.warnings.extend(
-                f"{jinja_file.name}: {w}" for w in changes.warnings
+    # With --stream each template is written as soon as it is transformed
+    # and only its summary is kept, so confirm and back up before Phase 3.
+    apply_now = args.stream and not args.dry_run
+    journal: Journal | None = None
+    if apply_now:
+        if not (args.yes or confirm_apply()):
+            return
+        if not args.no_backup:
+            backup_before_apply(
+                templates + up_to_date, asset_copies, args.backup_mode
             )
+        journal = Journal.start(args.journal)
 
-    # Report
-    print_report(result)
+    jsonl: JsonlReport | None = None
+    report_file: TextIO | None = None
+    if args.report_format == "jsonl":
+        if args.report_file:
+            report_file = args.report_file.open("w", encoding="utf-8")
+        jsonl = JsonlReport(report_file or report_stream or sys.stdout)
 
-    changed_files = [c for c in result.file_changes if c.changed]
+    renamed_count = 0
+    streamed: list[Path] = []  # written by --stream, .jinja not removed yet
+    try:
+        for changes in transform_files(
+            templates, registry, url_prefix, jobs=args.jobs
+        ):
+            if graph is not None:
+                graph.update(
+                    changes.file_path.with_suffix(".jinja"),
+                    changes.uses,
+                    changes.unresolved,
+                )
+            if jsonl is not None:
+                jsonl.file(changes)
+            elif args.stream:
+                print_diff_summary(changes, args.context, args.max_diff_lines)
+            if journal is not None:
+                journal.apply_template(changes)
+                streamed.append(changes.file_path)
+                if manifest is not None:
+                    manifest.record(changes, fingerprint)
+            result.add(changes, keep=not args.stream)
+    except BaseException:
+        if journal is not None:
+            journal.close()
+        raise
+    finally:
+        # Keep what was recorded even if the run is interrupted
+        if apply_now and manifest is not None:
+            manifest.save()
+
+    if graph is not None and not args.dry_run:
+        graph.save(graph_path)
+
+    # Report
+    if jsonl is not None:
+        jsonl.assets(result)
+        jsonl.summary(result)
+        if report_file is not None:
+            report_file.close()
+    else:
+        print_report(result, args.context, args.max_diff_lines)
 
     # If there are no content changes, no asset copies, and no .jinja files
     # to rename, there's nothing to do.
-    if not changed_files and not asset_copies and not result.file_changes:
+    if (
+        not result.templates_modified
+        and not asset_copies
+        and not result.summaries
+        and not up_to_date
+    ):
+        if journal is not None:
+            journal.commit()
         return
 
     if args.dry_run:
         print("  (dry-run mode -- no files modified)\n")
         return
 
-    # Confirm
-    answer = input("Apply changes? (y/n): ").strip().lower()
-    if answer != "y":
-        print("Aborted.")
-        return
-
-    # Backup. Every .jinja file will be removed (renamed to .jx), so back
-    # them all up — not just the ones whose content changed.
-    script_dir = Path(__file__).resolve().parent
-    if not args.no_backup:
-        backup_files = [c.file_path for c in result.file_changes]
-        asset_srcs = [src for src, _ in asset_copies]
-        backup_path = create_backup(
-            backup_files, asset_srcs, script_dir / "backups"
+    if not apply_now:
+        if not (args.yes or confirm_apply()):
+            return
+        # Every .jinja file will be removed (renamed to .jx), so back them
+        # all up — not just the ones whose content changed.
+        if not args.no_backup:
+            backup_before_apply(
+                [c.file_path for c in result.file_changes] + up_to_date,
+                asset_copies,
+                args.backup_mode,
+            )
+        journal = Journal.start(args.journal)
+
+    # Apply template changes and rename .jinja -> .jx. Every step goes
+    # through the journal, so an interrupted apply can be resumed or
+    # rolled back.
+    assert journal is not None
+    try:
+        renamed_count += journal.apply_templates(
+            result.file_changes, args.io_threads
+        )
+        if manifest is not None:
+            for changes in result.file_changes:
+                manifest.record(changes, fingerprint)
+        # Streamed and up-to-date templates already have their .jx; finish
+        # the rename.
+        renamed_count += journal.remove_templates(
+            streamed + up_to_date, args.io_threads
+        )
+        print(
+            f"  Modified {result.templates_modified} template(s); "
+            f"renamed {renamed_count} file(s) to .jx"
         )
-        print(f"\n  Backup created: {backup_path}")
-
-    # Apply template changes and rename .jinja -> .jx.
-    renamed_count = 0
-    for changes in result.file_changes:
-        new_path = changes.file_path.with_suffix(".jx")
-        new_path.write_text(changes.transformed, encoding="utf-8")
-        if changes.file_path != new_path and changes.file_path.exists():
-            changes.file_path.unlink()
-            renamed_count += 1
-    print(
-        f"  Modified {len(changed_files)} template(s); "
-        f"renamed {renamed_count} file(s) to .jx"
-    )
 
-    # Apply asset copies
-    execute_asset_copies(asset_copies, dry_run=False)
-    print(f"  Copied {len(asset_copies)} asset file(s)")
+        # Apply asset copies
+        with timed_phase("assets"):
+            journal.copy_assets(asset_copies, args.io_threads)
+            journal.copy_assets(asset_links, args.io_threads, link=True)
+        print(
+            f"  Copied {len(asset_copies)} asset file(s) "
+            f"({len(asset_conflicts)} replacing a different file); "
+            f"{len(asset_unchanged)} already up to date"
+        )
+        if asset_links:
+            print(
+                f"  Hardlinked {len(asset_links)} identical asset file(s), "
+                f"saving {bytes_saved} bytes"
+            )
+        journal.commit()
+    finally:
+        journal.close()
+        if manifest is not None:
+            manifest.save()
 
     print("\nMigration complete!")
 
@@ -0,0 +1,151 @@
+"""Jinja2 loader that migrates JinjaX templates to Jx syntax as they load.
+
+Lets unmigrated `.jinja` sources be served as Jx templates during a gradual
+rollout, instead of migrating the whole tree at once:
+
+    from pathlib import Path
+    from migrate import CatalogFolder
+    from migrate_loader import MigratingLoader
+
+    loader = MigratingLoader.from_folders(
+        [CatalogFolder(Path("components"), "")], url_prefix="/static/"
+    )
+
+The component registry is built once. Each `.jinja` source is migrated the
+first time it is loaded and kept in an LRU cache, keyed by template and
+checked against the file's mtime and the registry fingerprint, so repeated
+loads of an unchanged template skip the migration.
+
+Requires Jinja2 (the `jinja` extra).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+
+from jinja2 import (
+    BaseLoader,
+    ChoiceLoader,
+    Environment,
+    FileSystemLoader,
+    PrefixLoader,
+    TemplateNotFound,
+)
+
+from migrate import (
+    CatalogFolder,
+    ComponentRegistry,
+    hash_text,
+    migrate_source,
+    registry_fingerprint,
+)
+
+DEFAULT_CACHE_SIZE = 1024
+
+
+class MigratingLoader(BaseLoader):
+    """Wrap a loader so the `.jinja` sources it returns are migrated to Jx
+    syntax before Jinja compiles them. A `.jx` name that the wrapped loader
+    does not have is looked up as `.jinja` instead."""
+
+    def __init__(
+        self,
+        loader: BaseLoader,
+        registry: ComponentRegistry,
+        url_prefix: str = "/static/",
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.loader = loader
+        self.registry = registry
+        self.url_prefix = url_prefix
+        self.cache_size = cache_size
+        self.fingerprint = registry_fingerprint(registry, url_prefix)
+        # filename -> (mtime or source hash, fingerprint, migrated source)
+        self._cache: OrderedDict[str, tuple[object, str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_folders(
+        cls,
+        folders: list[CatalogFolder],
+        url_prefix: str = "/static/",
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> MigratingLoader:
+        """Build the registry from catalog folders and load templates from
+        them, searched in order. Templates in a prefixed folder are loaded
+        by the names Jx imports them with, e.g. "@ui/Alert.jx"."""
+        registry = ComponentRegistry()
+        for folder in folders:
+            registry.add_folder(folder)
+        loader = ChoiceLoader([
+            PrefixLoader(
+                {f"@{folder.prefix}": FileSystemLoader(folder.path)}, delimiter="/"
+            )
+            if folder.prefix
+            else FileSystemLoader(folder.path)
+            for folder in folders
+        ])
+        return cls(loader, registry, url_prefix, cache_size)
+
+    def refresh(self) -> None:
+        """Recompute the registry fingerprint after changing the registry,
+        so templates migrated with the old one are migrated again."""
+        self.fingerprint = registry_fingerprint(self.registry, self.url_prefix)
+
+    def get_source(
+        self, environment: Environment, template: str
+    ) -> tuple[str, str | None, Callable[[], bool] | None]:
+        try:
+            source, filename, uptodate = self.loader.get_source(environment, template)
+        except TemplateNotFound:
+            if not template.endswith(".jx"):
+                raise
+            source, filename, uptodate = self.loader.get_source(
+                environment, template.removesuffix(".jx") + ".jinja"
+            )
+            template = template.removesuffix(".jx") + ".jinja"
+
+        if not (filename or template).endswith(".jinja"):
+            return source, filename, uptodate
+        return self._migrate(source, filename, template), filename, uptodate
+
+    def _migrate(self, source: str, filename: str | None, template: str) -> str:
+        key = filename or template
+        try:
+            stamp: object = os.stat(filename).st_mtime_ns if filename else None
+        except OSError:
+            stamp = None
+        if stamp is None:
+            stamp = hash_text(source)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[:2] == (stamp, self.fingerprint):
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+
+        info = self.registry.by_path.get(Path(filename).resolve()) if filename else None
+        text = migrate_source(
+            source,
+            registry=self.registry,
+            url_prefix=self.url_prefix,
+            component=info.jinjax_name if info else None,
+        ).text
+
+        with self._lock:
+            self._cache[key] = (stamp, self.fingerprint, text)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    def list_templates(self) -> list[str]:
+        return self.loader.list_templates()
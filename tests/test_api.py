@@ -0,0 +1,91 @@
+import pytest
+
+from migrate import (
+    ComponentRegistry,
+    migrate_source,
+    transform_file,
+)
+
+ENTRIES = [
+    ("Badge.jinja", False, False),
+    ("Button.jinja", True, True),
+    ("Card.jinja", True, False),
+    ("common/Form.jinja", False, False),
+    ("foo/lorem-ipsum/Bar.jinja", False, False),
+]
+
+
+@pytest.fixture
+def memory_registry():
+    registry = ComponentRegistry.from_entries(ENTRIES)
+    registry.add_entries([("Alert.jinja", True, False)], prefix="ui")
+    return registry
+
+
+class TestRegistryFromEntries:
+    def test_registers_components(self, memory_registry):
+        assert sorted(memory_registry.components) == [
+            "Badge", "Button", "Card", "common.Form", "foo.lorem-ipsum.Bar", "ui:Alert",
+        ]
+        alert = memory_registry.components["ui:Alert"]
+        assert alert.import_path == "@ui/Alert.jx"
+        assert alert.has_css and not alert.has_js
+
+    def test_matches_scanned_registry(self, registry, memory_registry):
+        for name, info in registry.components.items():
+            other = memory_registry.components[name]
+            assert other.import_path == info.import_path
+            assert (other.has_css, other.has_js) == (info.has_css, info.has_js)
+
+
+class TestMigrateSource:
+    def test_page(self, memory_registry):
+        result = migrate_source(
+            '<Card title="x" />\n<ui:Alert message="hi" />\n'
+            "{{ content('footer') }}\n",
+            registry=memory_registry,
+            url_prefix="/static/",
+        )
+        assert result.changed
+        assert '{#import "Card.jx" as Card #}' in result.text
+        assert '{#import "@ui/Alert.jx" as Alert #}' in result.text
+        assert "{% slot footer %}{% endslot %}" in result.text
+        assert result.uses == ["Card", "ui:Alert"]
+        assert result.stats.imports_added == 2
+
+    def test_component_assets(self, memory_registry):
+        result = migrate_source(
+            "{#def title #}\n<div>{{ title }}</div>\n",
+            registry=memory_registry,
+            url_prefix="/static/",
+            component="Card",
+        )
+        assert "{#css /static/Card.css #}" in result.text
+
+    def test_assets_before_raw_block(self, memory_registry):
+        result = migrate_source(
+            "{#js a.js #}{% raw %}x{% endraw %}",
+            registry=memory_registry,
+            url_prefix="/static/",
+            component="Card",
+        )
+        assert result.text == (
+            "{#js /static/a.js #}{#css /static/Card.css #}\n{% raw %}x{% endraw %}"
+        )
+
+    def test_same_as_transform_file(self, tmp_components, registry):
+        path = tmp_components / "Button.jinja"
+        memory = ComponentRegistry.from_entries(ENTRIES)
+        result = migrate_source(
+            path.read_text(),
+            registry=memory,
+            url_prefix="/static/",
+            component="Button",
+        )
+        assert result.text == transform_file(path, registry, "/static/").transformed
+
+    def test_unknown_component(self, memory_registry):
+        with pytest.raises(ValueError, match="Unknown component"):
+            migrate_source(
+                "", registry=memory_registry, url_prefix="/", component="Nope"
+            )
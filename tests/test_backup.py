@@ -1,4 +1,8 @@
-from migrate import create_backup
+import tarfile
+
+import pytest
+
+from migrate import create_backup, reflink_or_copy
 
 
 class TestCreateBackup:
@@ -35,3 +39,40 @@ class TestCreateBackup:
         # Should not raise
         backup_path = create_backup([missing], [], tmp_path / "backups")
         assert backup_path.exists()
+
+
+class TestBackupModes:
+    @pytest.fixture
+    def src(self, tmp_path):
+        src = tmp_path / "project" / "test.jinja"
+        src.parent.mkdir()
+        src.write_text("original")
+        return src
+
+    @pytest.mark.parametrize("mode", ["copy", "hardlink", "reflink"])
+    def test_folder_modes(self, tmp_path, src, mode):
+        backup_path = create_backup([src], [], tmp_path / "backups", mode)
+        (backed_up,) = backup_path.rglob("test.jinja")
+        assert backed_up.read_text() == "original"
+        assert (backed_up.stat().st_nlink == 2) == (mode == "hardlink")
+
+    def test_hardlink_survives_migration(self, tmp_path, src):
+        backup_path = create_backup([src], [], tmp_path / "backups", "hardlink")
+        src.with_suffix(".jx").write_text("migrated")
+        src.unlink()
+        (backed_up,) = backup_path.rglob("test.jinja")
+        assert backed_up.read_text() == "original"
+
+    def test_tar(self, tmp_path, src):
+        backup_path = create_backup([src], [], tmp_path / "backups", "tar")
+        assert backup_path.name.endswith(".tar.gz")
+        with tarfile.open(backup_path) as archive:
+            (name,) = archive.getnames()
+            assert name.endswith("project/test.jinja")
+            assert archive.extractfile(name).read() == b"original"
+
+    def test_reflink_falls_back_to_copy(self, tmp_path, src):
+        dest = tmp_path / "clone.jinja"
+        reflink_or_copy(src, dest)
+        assert dest.read_text() == "original"
+        assert dest.stat().st_mtime == pytest.approx(src.stat().st_mtime)
@@ -0,0 +1,41 @@
+from benchmarks.bench_pipeline import bench
+from benchmarks.catalog import generate_catalog
+from migrate import ComponentRegistry, transform_files
+
+
+def read_tree(root):
+    return {
+        path.relative_to(root): path.read_text()
+        for path in sorted(root.rglob("*"))
+        if path.is_file()
+    }
+
+
+class TestGenerateCatalog:
+    def test_deterministic(self, tmp_path):
+        generate_catalog(tmp_path / "a", 40, seed=1)
+        generate_catalog(tmp_path / "b", 40, seed=1)
+        assert read_tree(tmp_path / "a") == read_tree(tmp_path / "b")
+
+    def test_catalog_migrates_cleanly(self, tmp_path):
+        folders = generate_catalog(tmp_path, 60, prefixes=3)
+        assert [f.prefix for f in folders] == ["", "v1", "v2"]
+
+        registry = ComponentRegistry()
+        for folder in folders:
+            registry.add_folder(folder)
+        assert len(registry.templates) == 60
+
+        changes = list(transform_files(registry.templates, registry, "/static/"))
+        assert not [w for c in changes for w in c.warnings]
+        assert sum(c.stats.fills_migrated for c in changes) > 0
+        assert sum(c.stats.imports_added for c in changes) > 0
+        assert any("{% raw %}" in c.transformed for c in changes)
+
+
+class TestBenchPipeline:
+    def test_bench_runs_every_phase(self):
+        run = bench(40, jobs=1, io_threads=2)
+        assert run["changed"] == 40
+        assert run["assets"] > 0
+        assert all(run[phase] > 0 for phase in ("phase1", "phase3", "apply"))
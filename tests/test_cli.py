@@ -0,0 +1,125 @@
+import json
+import sys
+
+import pytest
+
+import migrate
+from migrate import MANIFEST_NAME, USAGE_GRAPH_NAME, UsageGraph
+
+
+@pytest.fixture
+def cli(tmp_components, tmp_path, monkeypatch):
+    """Run the migration tool headlessly on the test components."""
+    monkeypatch.chdir(tmp_path)
+
+    def run(*args):
+        monkeypatch.setattr(sys, "argv", [
+            "migrate.py",
+            "--folder", str(tmp_components),
+            "--static", str(tmp_path / "static"),
+            "--url-prefix", "/static/",
+            "--yes",
+            "--no-backup",
+            "--jobs", "1",
+            *args,
+        ])
+        migrate.main()
+
+    return run
+
+
+class TestDryRun:
+    def test_incremental_writes_nothing(self, cli, tmp_components, tmp_path):
+        cli("--dry-run", "--incremental")
+        assert not (tmp_path / USAGE_GRAPH_NAME).exists()
+        assert not (tmp_path / MANIFEST_NAME).exists()
+        assert not list(tmp_components.rglob("*.jx"))
+
+    def test_only_affected_by_keeps_graph(self, cli, tmp_components, tmp_path):
+        page = (tmp_components / "Page.jinja").resolve()
+        page.write_text("<Card />\n<Badge />\n")
+        graph = UsageGraph()
+        graph.update(page, ["Card"])
+        graph.save(tmp_path / USAGE_GRAPH_NAME)
+        saved = (tmp_path / USAGE_GRAPH_NAME).read_text()
+
+        cli("--dry-run", "--only-affected-by", "Card")
+        assert (tmp_path / USAGE_GRAPH_NAME).read_text() == saved
+
+
+class TestIncremental:
+    def test_second_run_imports_migrated(
+        self, cli, tmp_components, capsys
+    ):
+        cli("--incremental")
+        assert not list(tmp_components.rglob("*.jinja"))
+        (tmp_components / "New.jinja").write_text("<Card />\n")
+        capsys.readouterr()
+
+        cli("--incremental")
+        out = capsys.readouterr().out
+        assert "Found 5 components" in out
+        assert "Skipping 0 up-to-date template(s); 4 already migrated" in out
+        assert (tmp_components / "New.jx").read_text() == (
+            '{#import "Card.jx" as Card #}\n<Card />\n'
+        )
+
+    def test_only_affected_by_after_apply(
+        self, cli, tmp_components, tmp_path, capsys
+    ):
+        page = tmp_components / "Page.jinja"
+        page.write_text("<Card />\n")
+        cli("--incremental")
+        jx = page.with_suffix(".jx")
+        jx.write_text(jx.read_text() + "<common.Form />\n")
+        capsys.readouterr()
+
+        cli("--only-affected-by", "Card")
+        assert "1 template(s) use Card" in capsys.readouterr().out
+        assert jx.read_text() == (
+            '{#import "Card.jx" as Card #}\n'
+            '{#import "common/Form.jx" as Form #}\n'
+            "<Card />\n<Form />\n"
+        )
+        graph = UsageGraph.load(tmp_path / USAGE_GRAPH_NAME)
+        assert graph.uses[page.resolve()] == {"Card", "common.Form"}
+
+
+class TestJsonlReport:
+    def test_stream_applies_changes(self, cli, tmp_components, tmp_path):
+        report = tmp_path / "report.jsonl"
+        cli("--stream", "--report-format", "jsonl", "--report-file", str(report))
+        assert not list(tmp_components.rglob("*.jinja"))
+        assert (tmp_components / "Card.jx").read_text().startswith(
+            "{#css /static/Card.css #}"
+        )
+        records = [json.loads(line) for line in report.read_text().splitlines()]
+        assert sum(r["type"] == "file" for r in records) == 4
+
+    @pytest.mark.parametrize("args", [[], ["--stream"], ["--dry-run", "--profile"]])
+    def test_stdout_is_only_jsonl(self, cli, capsys, args):
+        cli("--report-format", "jsonl", *args)
+        out, err = capsys.readouterr()
+        records = [json.loads(line) for line in out.splitlines()]
+        assert records[-1]["type"] == "summary"
+        assert "Step 4: Scanning components" in err
+        file_record = next(r for r in records if r["type"] == "file")
+        assert set(file_record["timings"]) >= {"read", "3b", "3f"}
+
+
+class TestStream:
+    def test_rerun_after_interrupted_stream(self, cli, tmp_components):
+        (tmp_components / "A.jinja").write_text("<p>a</p>\n")
+        (tmp_components / "B.jinja").write_bytes(b"\xff\n")
+        (tmp_components / "C.jinja").write_text("<A></A>\n")
+        with pytest.raises(UnicodeDecodeError):
+            cli("--stream")
+        cli("--resume")
+        assert len(list(tmp_components.rglob("*.jinja"))) == 7
+
+        (tmp_components / "B.jinja").write_text("<p>b</p>\n")
+        cli("--stream")
+        assert not list(tmp_components.rglob("*.jinja"))
+        assert (tmp_components / "C.jx").read_text() == (
+            '{#import "A.jx" as A #}\n<A></A>\n'
+        )
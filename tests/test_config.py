@@ -0,0 +1,89 @@
+import argparse
+
+import pytest
+
+from migrate import (
+    CatalogFolder,
+    load_config,
+    normalize_url_prefix,
+    parse_folder_arg,
+    resolve_config,
+)
+
+
+def make_args(**kwargs):
+    defaults = {"config": None, "folder": None, "static": None, "url_prefix": None}
+    return argparse.Namespace(**{**defaults, **kwargs})
+
+
+class TestParseFolderArg:
+    def test_path_only(self, tmp_path):
+        assert parse_folder_arg(str(tmp_path)) == CatalogFolder(tmp_path, "")
+
+    def test_path_and_prefix(self, tmp_path):
+        assert parse_folder_arg(f"{tmp_path}:ui") == CatalogFolder(tmp_path, "ui")
+
+    def test_drive_letter_is_not_a_prefix(self):
+        folder = parse_folder_arg("C:/templates")
+        assert folder.prefix == ""
+
+
+class TestNormalizeUrlPrefix:
+    def test_default_and_trailing_slash(self):
+        assert normalize_url_prefix("") == "/static/"
+        assert normalize_url_prefix("/assets") == "/assets/"
+
+
+class TestLoadConfig:
+    def test_paths_relative_to_file(self, tmp_path):
+        path = tmp_path / "jx-migrate.toml"
+        path.write_text(
+            'static = "static"\n'
+            'url_prefix = "/assets"\n'
+            "[[folders]]\n"
+            'path = "components"\n'
+            "[[folders]]\n"
+            'path = "vendor"\n'
+            'prefix = "ui"\n'
+        )
+        config = load_config(path)
+        assert config.folders == [
+            CatalogFolder(tmp_path / "components", ""),
+            CatalogFolder(tmp_path / "vendor", "ui"),
+        ]
+        assert config.static_folder == tmp_path / "static"
+        assert config.url_prefix == "/assets/"
+
+    def test_invalid(self, tmp_path):
+        path = tmp_path / "jx-migrate.toml"
+        path.write_text("[[folders]]\nprefix = 'ui'\n")
+        with pytest.raises(ValueError, match="needs a 'path'"):
+            load_config(path)
+        path.write_text("static = \n")
+        with pytest.raises(ValueError, match="Cannot read"):
+            load_config(path)
+
+
+class TestResolveConfig:
+    def test_flags_override_file(self, tmp_components, tmp_prefixed, tmp_path):
+        path = tmp_path / "jx-migrate.toml"
+        path.write_text(
+            'static = "static"\n[[folders]]\npath = "components"\n'
+        )
+        config = resolve_config(make_args(
+            config=path, folder=[f"{tmp_prefixed}:ui"], url_prefix="/s"
+        ))
+        assert config.folders == [CatalogFolder(tmp_prefixed, "ui")]
+        assert config.static_folder == tmp_path / "static"
+        assert config.url_prefix == "/s/"
+
+    def test_nothing_given(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        config = resolve_config(make_args())
+        assert config.folders == []
+        assert config.static_folder is None
+        assert config.url_prefix is None
+
+    def test_missing_folder(self, tmp_path):
+        with pytest.raises(ValueError, match="not a valid directory"):
+            resolve_config(make_args(folder=[str(tmp_path / "nope")]))
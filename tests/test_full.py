@@ -1,6 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import migrate
 from migrate import (
     CatalogFolder,
+    MigrationResult,
     transform_file,
+    transform_files,
 )
 
 
@@ -95,3 +100,80 @@ class TestTransformFile:
         assert "<Alert " in t
         assert "ui:Alert" not in t
 
+    def test_raw_blocks_protected_in_all_phases(self, tmp_components, registry):
+        raw = (
+            '{% raw %}{{ content("header") }}{{ catalog.render_assets() }}'
+            '{#css Card.css #}{% if _slot == "a" %}A{% endif %}<Card />'
+            '{% endraw %}'
+        )
+        page = tmp_components / "RawPage.jinja"
+        page.write_text(raw + "\n<Card />\n")
+        registry.add_folder(CatalogFolder(path=tmp_components, prefix=""))
+        changes = transform_file(page, registry, "/static/")
+        assert changes.transformed == (
+            '{#import "Card.jx" as Card #}\n' + raw + "\n<Card />\n"
+        )
+
+
+class TestTransformFiles:
+    def test_parallel_matches_serial(self, tmp_components, registry):
+        (tmp_components / "Page.jinja").write_text(
+            "<Card />\n<common.Form />\n{{ content('x') }}\n"
+        )
+        registry.add_folder(CatalogFolder(path=tmp_components, prefix=""))
+        files = sorted(tmp_components.rglob("*.jinja"))
+        serial = list(transform_files(files, registry, "/static/", jobs=1))
+        parallel = list(transform_files(files, registry, "/static/", jobs=2))
+        assert [c.file_path for c in parallel] == files
+        assert [c.transformed for c in parallel] == [c.transformed for c in serial]
+
+
+    def test_bounded_submissions(self, tmp_components, registry, monkeypatch):
+        for i in range(200):
+            (tmp_components / f"Page{i}.jinja").write_text("<Card />\n")
+        files = sorted(tmp_components.rglob("*.jinja"))
+        submitted = []
+
+        class CountingPool(ProcessPoolExecutor):
+            def submit(self, fn, chunk):
+                submitted.append(len(chunk))
+                return super().submit(fn, chunk)
+
+        monkeypatch.setattr(migrate, "ProcessPoolExecutor", CountingPool)
+        results = transform_files(files, registry, "/static/", jobs=2)
+        next(results)
+        in_flight = 2 * migrate.TRANSFORM_CHUNKS_PER_JOB + 1
+        assert sum(submitted) <= in_flight * migrate.TRANSFORM_CHUNK_SIZE
+        assert [c.file_path for c in results] == files[1:]
+        assert sum(submitted) == len(files)
+
+
+class TestChangeStats:
+    def test_counts_gathered_during_transform(self, tmp_components, registry):
+        page = tmp_components / "StatsPage.jinja"
+        page.write_text(
+            '{{ content("header") }}{{ content("footer") }}\n'
+            '<head>{{ catalog.render_assets() }}</head>\n'
+            '<Card>{% if _slot == "a" %}A{% elif _slot == "b" %}B{% endif %}'
+            "</Card>\n"
+            "<common.Form />\n"
+        )
+        registry.add_folder(CatalogFolder(path=tmp_components, prefix=""))
+        stats = transform_file(page, registry, "/static/").stats
+        assert stats.slots_migrated == 2
+        assert stats.asset_calls_migrated == 1
+        assert stats.fills_migrated == 2
+        assert stats.imports_added == 2
+
+    def test_result_totals_without_keeping_text(self, tmp_components, registry):
+        (tmp_components / "Page.jinja").write_text("<Card />\n")
+        registry.add_folder(CatalogFolder(path=tmp_components, prefix=""))
+        result = MigrationResult()
+        for changes in transform_files(
+            sorted(tmp_components.rglob("*.jinja")), registry, "/static/"
+        ):
+            result.add(changes, keep=False)
+        assert result.file_changes == []
+        assert len(result.summaries) == 5
+        assert result.templates_modified == 3  # Button, Card and Page
+        assert result.stats.imports_added == 1
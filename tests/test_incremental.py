@@ -0,0 +1,172 @@
+from migrate import (
+    CatalogFolder,
+    ComponentRegistry,
+    Manifest,
+    UsageGraph,
+    registry_fingerprint,
+    transform_file,
+)
+
+
+def migrate_and_record(path, registry, manifest, fingerprint):
+    changes = transform_file(path, registry, "/static/")
+    path.with_suffix(".jx").write_text(changes.transformed, encoding="utf-8")
+    manifest.record(changes, fingerprint)
+    return changes
+
+
+class TestRegistryFingerprint:
+    def test_stable(self, registry):
+        assert registry_fingerprint(registry, "/static/") == registry_fingerprint(
+            registry, "/static/"
+        )
+
+    def test_changes_with_url_prefix(self, registry):
+        assert registry_fingerprint(registry, "/static/") != registry_fingerprint(
+            registry, "/assets/"
+        )
+
+    def test_changes_with_components(self, registry, tmp_path):
+        before = registry_fingerprint(registry, "/static/")
+        extra = tmp_path / "extra"
+        extra.mkdir()
+        (extra / "New.jinja").write_text("")
+        registry.add_folder(CatalogFolder(path=extra, prefix=""))
+        assert registry_fingerprint(registry, "/static/") != before
+
+
+class TestManifest:
+    def test_up_to_date_after_record(self, registry, tmp_components, tmp_path):
+        card = tmp_components / "Card.jinja"
+        fp = registry_fingerprint(registry, "/static/")
+        manifest = Manifest(tmp_path / "manifest.json")
+        assert not manifest.is_up_to_date(card, fp)
+        migrate_and_record(card, registry, manifest, fp)
+        assert manifest.is_up_to_date(card, fp)
+
+    def test_input_change_invalidates(self, registry, tmp_components, tmp_path):
+        card = tmp_components / "Card.jinja"
+        fp = registry_fingerprint(registry, "/static/")
+        manifest = Manifest(tmp_path / "manifest.json")
+        migrate_and_record(card, registry, manifest, fp)
+        card.write_text("<div>changed</div>\n")
+        assert not manifest.is_up_to_date(card, fp)
+
+    def test_fingerprint_change_invalidates(
+        self, registry, tmp_components, tmp_path
+    ):
+        card = tmp_components / "Card.jinja"
+        fp = registry_fingerprint(registry, "/static/")
+        manifest = Manifest(tmp_path / "manifest.json")
+        migrate_and_record(card, registry, manifest, fp)
+        assert not manifest.is_up_to_date(card, "other")
+
+    def test_missing_or_edited_output_invalidates(
+        self, registry, tmp_components, tmp_path
+    ):
+        card = tmp_components / "Card.jinja"
+        fp = registry_fingerprint(registry, "/static/")
+        manifest = Manifest(tmp_path / "manifest.json")
+        migrate_and_record(card, registry, manifest, fp)
+        card.with_suffix(".jx").write_text("edited")
+        assert not manifest.is_up_to_date(card, fp)
+        card.with_suffix(".jx").unlink()
+        assert not manifest.is_up_to_date(card, fp)
+
+    def test_save_and_load(self, registry, tmp_components, tmp_path):
+        card = tmp_components / "Card.jinja"
+        fp = registry_fingerprint(registry, "/static/")
+        manifest = Manifest(tmp_path / "manifest.json")
+        migrate_and_record(card, registry, manifest, fp)
+        manifest.save()
+        loaded = Manifest.load(tmp_path / "manifest.json")
+        assert loaded.entries == manifest.entries
+        assert loaded.is_up_to_date(card, fp)
+
+    def test_migrated_registers_renamed_templates(
+        self, registry, tmp_components, tmp_prefixed, tmp_path
+    ):
+        card = (tmp_components / "Card.jinja").resolve()
+        fp = registry_fingerprint(registry, "/static/")
+        manifest = Manifest(tmp_path / "manifest.json")
+        migrate_and_record(card, registry, manifest, fp)
+        assert manifest.migrated() == []
+        card.unlink()
+        assert manifest.migrated() == [card]
+
+        rescanned = ComponentRegistry()
+        rescanned.add_folder(
+            CatalogFolder(path=tmp_components, prefix=""), manifest.migrated()
+        )
+        rescanned.add_folder(CatalogFolder(path=tmp_prefixed, prefix="ui"))
+        assert card not in rescanned.templates
+        assert rescanned.components["Card"].has_css
+        assert registry_fingerprint(rescanned, "/static/") == fp
+
+    def test_load_missing_or_invalid(self, tmp_path):
+        assert Manifest.load(tmp_path / "missing.json").entries == {}
+        bad = tmp_path / "bad.json"
+        bad.write_text("not json")
+        assert Manifest.load(bad).entries == {}
+
+
+class TestUsageGraph:
+    def test_records_uses_from_transform(self, registry, tmp_components):
+        page = tmp_components / "Page.jinja"
+        page.write_text("<Card /><common.Form />{% raw %}<Button />{% endraw %}")
+        registry.add_folder(CatalogFolder(path=tmp_components, prefix=""))
+        changes = transform_file(page, registry, "/static/")
+        assert changes.uses == ["Card", "common.Form"]
+
+        graph = UsageGraph()
+        graph.update(changes.file_path, changes.uses)
+        assert graph.dependents_of("Card") == [page]
+        assert graph.dependents_of("Button") == []
+
+    def test_update_replaces_edges(self, tmp_path):
+        page = tmp_path / "Page.jinja"
+        graph = UsageGraph()
+        graph.update(page, ["Card", "Button"])
+        graph.update(page, ["Button"])
+        assert graph.dependents_of("Card") == []
+        assert "Card" not in graph.dependents
+        assert graph.dependents_of("Button") == [page]
+        graph.update(page, [])
+        assert graph.uses == {}
+        assert graph.dependents == {}
+
+    def test_affected_by_resolves_tag_names(self, registry, tmp_path):
+        page = tmp_path / "Page.jinja"
+        graph = UsageGraph()
+        graph.update(page, ["common.Form"])
+        assert graph.affected_by("Common.Form", registry) == {page}
+        assert graph.affected_by("common.Form", registry) == {page}
+        assert graph.affected_by("Card", registry) == set()
+
+    def test_resolved_by(self, registry, tmp_components):
+        page = tmp_components / "Page.jinja"
+        page.write_text("<Card /><Foo />")
+        changes = transform_file(page, registry, "/static/")
+        assert changes.unresolved == ["Foo"]
+
+        graph = UsageGraph()
+        graph.update(page, changes.uses, changes.unresolved)
+        assert graph.resolved_by(registry) == set()
+        registry.add_entries([("Foo.jinja", False, False)])
+        assert graph.resolved_by(registry) == {page}
+
+    def test_save_and_load(self, tmp_path):
+        a, b, c = tmp_path / "A.jinja", tmp_path / "B.jinja", tmp_path / "C.jinja"
+        graph = UsageGraph()
+        graph.update(a, ["Card"])
+        graph.update(b, ["Card", "Button"], ["Foo"])
+        graph.update(c, [], ["Bar"])
+        graph.save(tmp_path / "usage.json")
+        loaded = UsageGraph.load(tmp_path / "usage.json")
+        assert loaded is not None
+        assert loaded.uses == graph.uses
+        assert loaded.unresolved == {b: {"Foo"}, c: {"Bar"}}
+        assert loaded.dependents_of("Card") == [a, b]
+
+    def test_load_missing(self, tmp_path):
+        assert UsageGraph.load(tmp_path / "missing.json") is None
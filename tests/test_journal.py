@@ -0,0 +1,166 @@
+from pathlib import Path
+
+import pytest
+
+import migrate
+from migrate import (
+    ApplyError,
+    CatalogFolder,
+    Journal,
+    resume_apply,
+    rollback_apply,
+    transform_file,
+)
+
+
+@pytest.fixture
+def changes(tmp_components, registry):
+    registry.add_folder(CatalogFolder(path=tmp_components, prefix=""))
+    return [
+        transform_file(path, registry, "/static/")
+        for path in sorted(tmp_components.rglob("*.jinja"))
+    ]
+
+
+def snapshot(root):
+    return {
+        path.relative_to(root): path.read_bytes()
+        for path in sorted(root.rglob("*"))
+        if path.is_file()
+    }
+
+
+def interrupt_after(monkeypatch, count):
+    """Make the apply stop (as if killed) when starting step `count`."""
+    redo = migrate._redo_step
+    calls = []
+
+    def flaky_redo(step):
+        calls.append(step)
+        if len(calls) > count:
+            raise KeyboardInterrupt
+        return redo(step)
+
+    monkeypatch.setattr(migrate, "_redo_step", flaky_redo)
+
+
+class TestJournal:
+    def test_apply_and_commit(self, tmp_path, tmp_components, changes):
+        path = tmp_path / "journal.jsonl"
+        journal = Journal.start(path)
+        renamed = journal.apply_templates(changes)
+        journal.commit()
+
+        assert renamed == len(changes)
+        assert not list(tmp_components.rglob("*.jinja"))
+        assert not Journal.is_pending(path)
+        steps, done, committed = Journal.read(path)
+        assert committed and done == {step["id"] for step in steps}
+
+    def test_records_paths_and_links_originals(
+        self, tmp_path, tmp_components, changes
+    ):
+        before = snapshot(tmp_components)
+        inodes = {c.file_path: c.file_path.stat().st_ino for c in changes}
+        path = tmp_path / "journal.jsonl"
+        journal = Journal.start(path)
+        journal.apply_templates(changes)
+        journal.commit()
+
+        text = path.read_text()
+        assert "<button>" not in text and "{#def" not in text
+        steps, _, _ = Journal.read(path)
+        for step in steps:
+            assert Path(step["original"]).stat().st_ino == inodes[Path(step["jinja"])]
+        assert not list(tmp_components.rglob("*.staged"))
+
+        rollback_apply(path)
+        assert snapshot(tmp_components) == before
+
+    def test_resume_interrupted_apply(
+        self, tmp_path, tmp_components, changes, monkeypatch
+    ):
+        path = tmp_path / "journal.jsonl"
+        journal = Journal.start(path)
+        interrupt_after(monkeypatch, 2)
+        with pytest.raises(KeyboardInterrupt):
+            for c in changes:
+                journal.apply_template(c)
+        journal.close()
+        monkeypatch.undo()
+
+        assert Journal.is_pending(path)
+        assert len(list(tmp_components.rglob("*.jx"))) == 2
+        assert resume_apply(path) == 1  # only the interrupted step was logged
+        assert not Journal.is_pending(path)
+        assert len(list(tmp_components.rglob("*.jx"))) == 3
+        # Streamed templates keep their .jinja until every one is written,
+        # so the run can be started again with every component
+        assert len(list(tmp_components.rglob("*.jinja"))) == len(changes)
+
+    def test_rollback_interrupted_apply(
+        self, tmp_path, tmp_components, changes, monkeypatch
+    ):
+        static = tmp_path / "static"
+        static.mkdir()
+        (static / "Card.css").write_text("old")
+        before = snapshot(tmp_path)
+
+        path = tmp_path / "journal" / "journal.jsonl"
+        path.parent.mkdir()
+        journal = Journal.start(path)
+        journal.copy_assets([
+            (tmp_components / "Card.css", static / "Card.css"),
+            (tmp_components / "Button.css", static / "css" / "Button.css"),
+        ])
+        interrupt_after(monkeypatch, 2)
+        with pytest.raises(KeyboardInterrupt):
+            for c in changes:
+                journal.apply_template(c)
+        journal.close()
+        monkeypatch.undo()
+
+        assert rollback_apply(path) == 5
+        assert not path.exists()
+        assert snapshot(tmp_path) == before
+
+    def test_truncated_last_line(self, tmp_path, changes):
+        path = tmp_path / "journal.jsonl"
+        journal = Journal.start(path)
+        journal.apply_template(changes[0])
+        journal.close()
+        with path.open("a") as f:
+            f.write('{"op": "templ')
+        steps, done, committed = Journal.read(path)
+        assert len(steps) == 1 and done == {0} and not committed
+
+    def test_threaded_apply_reports_failures_in_order(
+        self, tmp_path, tmp_components, changes, monkeypatch
+    ):
+        redo = migrate._redo_step
+
+        def failing_redo(step):
+            if Path(step["jinja"]).stem in ("Card", "Form"):
+                raise OSError(f"cannot write {step['jx']}")
+            return redo(step)
+
+        monkeypatch.setattr(migrate, "_redo_step", failing_redo)
+        path = tmp_path / "journal.jsonl"
+        journal = Journal.start(path)
+        with pytest.raises(ApplyError) as exc:
+            journal.apply_templates(changes, threads=4)
+        journal.close()
+        monkeypatch.undo()
+
+        failed = [path for path, _ in exc.value.failures]
+        assert failed == [
+            str(tmp_components / "Card.jinja"),
+            str(tmp_components / "common" / "Form.jinja"),
+        ]
+        assert sorted(p.name for p in tmp_components.rglob("*.jinja")) == [
+            "Card.jinja", "Form.jinja",
+        ]
+        assert Journal.is_pending(path)
+        assert resume_apply(path, threads=4) == 2
+        assert not list(tmp_components.rglob("*.jinja"))
+        assert not Journal.is_pending(path)
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+jinja2 = pytest.importorskip("jinja2")
+
+from migrate import CatalogFolder, ComponentRegistry
+from migrate_loader import MigratingLoader
+
+
+@pytest.fixture
+def page(tmp_components):
+    path = tmp_components / "Page.jinja"
+    path.write_text("<Card />\n<common.Form>{{ content('footer') }}</common.Form>\n")
+    return path
+
+
+@pytest.fixture
+def loader(tmp_components, page):
+    return MigratingLoader.from_folders(
+        [CatalogFolder(path=tmp_components, prefix="")], url_prefix="/static/"
+    )
+
+
+class TestMigratingLoader:
+    def test_migrates_jinja_sources(self, loader):
+        env = jinja2.Environment(loader=loader)
+        source, filename, _ = loader.get_source(env, "Page.jinja")
+        assert filename.endswith("Page.jinja")
+        assert '{#import "Card.jx" as Card #}' in source
+        assert "<Form>{% slot footer %}{% endslot %}</Form>" in source
+
+    def test_jx_name_falls_back_to_jinja(self, loader):
+        env = jinja2.Environment(loader=loader)
+        source, _, _ = loader.get_source(env, "Card.jx")
+        assert "{#css /static/Card.css #}" in source
+
+    def test_prefixed_import(self, tmp_components, tmp_prefixed, page):
+        page.write_text('<ui:Alert message="hi" />\n')
+        loader = MigratingLoader.from_folders([
+            CatalogFolder(path=tmp_components, prefix=""),
+            CatalogFolder(path=tmp_prefixed, prefix="ui"),
+        ])
+        env = jinja2.Environment(loader=loader)
+        source, _, _ = loader.get_source(env, "Page.jinja")
+        assert '{#import "@ui/Alert.jx" as Alert #}' in source
+
+        alert = env.get_template("@ui/Alert.jx")
+        assert alert.render(message="hi").strip() == '<div class="alert">hi</div>'
+        source, _, _ = loader.get_source(env, "@ui/Alert.jx")
+        assert "{#css /static/ui/Alert.css #}" in source
+
+    def test_missing_template(self, loader):
+        env = jinja2.Environment(loader=loader)
+        with pytest.raises(jinja2.TemplateNotFound):
+            loader.get_source(env, "Nope.jx")
+
+    def test_cache(self, loader, page):
+        env = jinja2.Environment(loader=loader)
+        first, _, _ = loader.get_source(env, "Page.jinja")
+        assert loader.get_source(env, "Page.jinja")[0] == first
+        assert (loader.hits, loader.misses) == (1, 1)
+
+        page.write_text("<Badge />\n")
+        stat = page.stat()
+        os.utime(page, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        source, _, _ = loader.get_source(env, "Page.jinja")
+        assert '{#import "Badge.jx" as Badge #}' in source
+        assert loader.misses == 2
+
+        loader.registry.add_entries([("Extra.jinja", False, False)])
+        loader.refresh()
+        loader.get_source(env, "Page.jinja")
+        assert loader.misses == 3
+
+    def test_lru_eviction(self, tmp_components, page):
+        loader = MigratingLoader.from_folders(
+            [CatalogFolder(path=tmp_components, prefix="")], cache_size=1
+        )
+        env = jinja2.Environment(loader=loader)
+        loader.get_source(env, "Page.jinja")
+        loader.get_source(env, "Card.jinja")
+        loader.get_source(env, "Page.jinja")
+        assert (loader.hits, loader.misses) == (0, 3)
+
+    def test_wraps_any_loader(self):
+        registry = ComponentRegistry.from_entries([("Card.jinja", False, False)])
+        loader = MigratingLoader(
+            jinja2.DictLoader({"page.jinja": "<Card />", "raw.html": "<Card />"}),
+            registry,
+        )
+        env = jinja2.Environment(loader=loader)
+        assert loader.get_source(env, "page.jinja")[0].startswith("{#import")
+        assert loader.get_source(env, "raw.html")[0] == "<Card />"
+        assert env.get_template("page.jinja").render().strip() == "<Card />"
+        assert loader.list_templates() == ["page.jinja", "raw.html"]
@@ -1,6 +1,10 @@
+from pathlib import Path
+
 from migrate import (
     CatalogFolder,
     ComponentRegistry,
+    component_name,
+    scan_templates,
 )
 
 
@@ -119,4 +123,59 @@ class TestComponentRegistry:
         reg.add_folder(CatalogFolder(path=comp, prefix=""))
         reg.add_folder(CatalogFolder(path=comp, prefix=""))
         # Second add shouldn't increase count because name already registered
-        assert len(reg.components) == 1
\ No newline at end of file
+        assert len(reg.components) == 1
+
+    def test_resolve_normalized(self, registry_with_nested):
+        info = registry_with_nested.resolve("Foo.LoremIpsum.Bar")
+        assert info is not None
+        assert info.jinjax_name == "foo.lorem-ipsum.Bar"
+
+    def test_resolve_ambiguous_fallback(self, tmp_path):
+        comp = tmp_path / "c"
+        (comp / "lorem-ipsum").mkdir(parents=True)
+        (comp / "lorem_ipsum").mkdir()
+        (comp / "lorem-ipsum" / "Bar.jinja").write_text("")
+        (comp / "lorem_ipsum" / "Bar.jinja").write_text("")
+        reg = ComponentRegistry()
+        reg.add_folder(CatalogFolder(path=comp, prefix=""))
+        assert reg.resolve("LoremIpsum.Bar") is None
+        assert reg.ambiguous_matches("LoremIpsum.Bar") == [
+            "lorem-ipsum.Bar",
+            "lorem_ipsum.Bar",
+        ]
+        # Exact names still resolve
+        assert reg.resolve("lorem_ipsum.Bar") is not None
+        assert reg.ambiguous_matches("lorem_ipsum.Bar") == []
+
+    def test_by_path_index(self, registry, tmp_components):
+        info = registry.by_path[(tmp_components / "Card.jinja").resolve()]
+        assert info.jinjax_name == "Card"
+        assert len(registry.by_path) == len(registry.components)
+
+
+class TestComponentName:
+    def test_names(self):
+        assert component_name(Path("Card.jinja")) == "Card"
+        assert component_name(Path("common/my-button.jinja")) == "common.MyButton"
+        assert component_name(Path("tab/index.jinja")) == "Tab"
+        assert component_name(Path("Alert.jinja"), "ui") == "ui:Alert"
+
+
+class TestScanTemplates:
+    def test_matches_rglob(self, tmp_components, tmp_nested_kebab):
+        for root in (tmp_components, tmp_nested_kebab):
+            found = [path for path, _, _ in scan_templates(root)]
+            assert found == sorted(root.rglob("*.jinja"))
+
+    def test_sibling_assets(self, tmp_components):
+        flags = {
+            path.name: (has_css, has_js)
+            for path, has_css, has_js in scan_templates(tmp_components)
+        }
+        assert flags["Card.jinja"] == (True, False)
+        assert flags["Button.jinja"] == (True, True)
+        assert flags["Badge.jinja"] == (False, False)
+
+    def test_registry_exposes_templates(self, registry, tmp_components):
+        assert registry.templates[:4] == sorted(tmp_components.rglob("*.jinja"))
+        assert len(registry.templates) == 5
@@ -1,9 +1,18 @@
 from migrate import (
+    Journal,
+    compare_asset_copies,
+    dedupe_asset_copies,
     plan_asset_copies,
-    execute_asset_copies,
 )
 
 
+def copy_assets(copies, journal_path):
+    journal = Journal.start(journal_path)
+    journal.copy_assets(copies)
+    journal.commit()
+    journal.close()
+
+
 class TestPlanAssetCopies:
     def test_plans_css_and_js(self, registry, tmp_path):
         static = tmp_path / "static"
@@ -35,7 +44,7 @@ class TestPlanAssetCopies:
         assert "Badge.js" not in sources
 
 
-class TestExecuteAssetCopies:
+class TestCopyAssets:
     def test_copies_files(self, tmp_path):
         src_dir = tmp_path / "src"
         src_dir.mkdir()
@@ -43,22 +52,75 @@ class TestExecuteAssetCopies:
         src_file.write_text("body {}")
         dest_file = tmp_path / "dest" / "test.css"
 
-        execute_asset_copies([(src_file, dest_file)], dry_run=False)
+        copy_assets([(src_file, dest_file)], tmp_path / "journal.jsonl")
         assert dest_file.exists()
         assert dest_file.read_text() == "body {}"
 
-    def test_dry_run_skips(self, tmp_path):
-        src_file = tmp_path / "test.css"
-        src_file.write_text("body {}")
-        dest_file = tmp_path / "dest" / "test.css"
-
-        execute_asset_copies([(src_file, dest_file)], dry_run=True)
-        assert not dest_file.exists()
-
     def test_creates_parent_dirs(self, tmp_path):
         src_file = tmp_path / "test.css"
         src_file.write_text("body {}")
         dest_file = tmp_path / "a" / "b" / "c" / "test.css"
 
-        execute_asset_copies([(src_file, dest_file)], dry_run=False)
+        copy_assets([(src_file, dest_file)], tmp_path / "journal.jsonl")
         assert dest_file.exists()
+
+
+class TestDedupeAssetCopies:
+    def make_copies(self, tmp_path, contents):
+        copies = []
+        for i, content in enumerate(contents):
+            src_file = tmp_path / "src" / f"{i}.css"
+            src_file.parent.mkdir(exist_ok=True)
+            src_file.write_text(content)
+            copies.append((src_file, tmp_path / "static" / f"{i}.css"))
+        return copies
+
+    def test_identical_content_linked(self, tmp_path):
+        copies = self.make_copies(tmp_path, ["a {}", "b {}", "a {}", "bb {}", "a {}"])
+        unique, links, saved = dedupe_asset_copies(copies)
+        dests = [dest for _, dest in copies]
+        assert unique == [copies[0], copies[1], copies[3]]
+        assert links == [(dests[0], dests[2]), (dests[0], dests[4])]
+        assert saved == 2 * len("a {}")
+
+    def test_nothing_to_dedupe(self, tmp_path):
+        copies = self.make_copies(tmp_path, ["a {}", "b {}"])
+        assert dedupe_asset_copies(copies) == (copies, [], 0)
+
+    def test_journaled_links(self, tmp_path):
+        copies = self.make_copies(tmp_path, ["a {}", "a {}"])
+        unique, links, _ = dedupe_asset_copies(copies)
+        journal = Journal.start(tmp_path / "journal.jsonl")
+        journal.copy_assets(unique)
+        journal.copy_assets(links, link=True)
+        journal.commit()
+        first, second = (dest for _, dest in copies)
+        assert second.read_text() == "a {}"
+        assert first.stat().st_ino == second.stat().st_ino
+
+
+class TestCompareAssetCopies:
+    def test_sorts_copies(self, tmp_path):
+        static = tmp_path / "static"
+        static.mkdir()
+        copies = []
+        for name in ("new", "copied", "same", "changed", "resized"):
+            src_file = tmp_path / f"{name}.css"
+            src_file.write_text(f".{name} {{}}")
+            copies.append((src_file, static / f"{name}.css"))
+        copy_assets(copies[1:2], tmp_path / "journal.jsonl")  # keeps the mtime
+        (static / "same.css").write_text(".same {}")       # same content
+        (static / "changed.css").write_text(".chang {}")   # same size
+        (static / "resized.css").write_text("x")
+
+        to_copy, unchanged, conflicts = compare_asset_copies(copies)
+        assert to_copy == [copies[0], copies[3], copies[4]]
+        assert unchanged == [copies[1], copies[2]]
+        assert conflicts == [copies[3], copies[4]]
+
+    def test_second_run_copies_nothing(self, tmp_path):
+        src_file = tmp_path / "a.css"
+        src_file.write_text("a {}")
+        copies = [(src_file, tmp_path / "static" / "a.css")]
+        copy_assets(copies, tmp_path / "journal.jsonl")
+        assert compare_asset_copies(copies) == ([], copies, [])
@@ -147,6 +147,20 @@ class TestAddAutoAssets:
         js_line = next(i for i, line in enumerate(lines) if "Card.js" in line)
         assert js_line > css_line
 
+    def test_inserts_after_asset_decl_without_newline(self):
+        source = "{#js a.js #}__RAW_0__"
+        info = ComponentInfo(
+            jinjax_name="Card",
+            file_path=Path("/c/Card.jinja"),
+            rel_path="Card.jinja",
+            prefix="",
+            import_path="Card.jinja",
+            has_css=True,
+            css_path=Path("/c/Card.css"),
+        )
+        result = add_auto_assets(source, info, "/static/")
+        assert result == "{#js a.js #}{#css /static/Card.css #}\n__RAW_0__"
+
     def test_prefixed_component_url(self):
         source = "{#def message #}\n"
         info = ComponentInfo(
@@ -1,7 +1,12 @@
 
 from migrate import (
+    CatalogFolder,
+    ComponentRegistry,
     find_component_tags,
     generate_imports_and_rename,
+    protect_raw_blocks,
+    rename_tags,
+    restore_raw_blocks,
 )
 
 
@@ -40,6 +45,26 @@ class TestFindComponentTags:
         assert tags == {"Card"}
 
 
+class TestRenameTags:
+    def test_renames_opening_closing_and_self_closing(self):
+        source = '<common.Form a="1">\n<ui:Button/></common.Form>\n<ui:Button\n/>'
+        result = rename_tags(source, {"common.Form": "Form", "ui:Button": "Button"})
+        assert result == '<Form a="1">\n<Button/></Form>\n<Button\n/>'
+
+    def test_does_not_rename_longer_names(self):
+        source = "<common.Form><common.FormField /></common.Form>"
+        result = rename_tags(source, {"common.Form": "Form"})
+        assert result == "<Form><common.FormField /></Form>"
+
+    def test_follows_later_renames(self):
+        source = "<a.Card /><Card />"
+        result = rename_tags(source, {"a.Card": "Card", "Card": "BaseCard"})
+        assert result == "<BaseCard /><BaseCard />"
+
+    def test_empty_renames(self):
+        assert rename_tags("<Card />", {}) == "<Card />"
+
+
 class TestGenerateImportsAndRename:
     def test_simple_import(self, registry, tmp_path):
         source = "<Card>content</Card>"
@@ -90,11 +115,23 @@ class TestGenerateImportsAndRename:
         )
         assert result.count('{#import "Card.jx" as Card #}') == 1
 
+    def test_aliases_of_existing_imports(self, registry, tmp_path):
+        source = '{#import "common/Form.jx" as Form #}\n<Form />'
+        used, unresolved = set(), set()
+        result, warnings = generate_imports_and_rename(
+            source, tmp_path / "Page.jx", registry, used, unresolved=unresolved
+        )
+        assert result == source
+        assert used == {"common.Form"}
+        assert not unresolved
+
     def test_raw_blocks_protected(self, registry, tmp_path):
         source = "{% raw %}<Card />{% endraw %}\n<Button />"
+        protected, placeholders = protect_raw_blocks(source)
         result, warnings = generate_imports_and_rename(
-            source, tmp_path / "Page.jinja", registry
+            protected, tmp_path / "Page.jinja", registry
         )
+        result = restore_raw_blocks(result, placeholders)
         # Card inside raw should not be imported
         assert "Card.jx" not in result
         # Button outside raw should be imported
@@ -121,6 +158,22 @@ class TestGenerateImportsAndRename:
         card_line = next(i for i, line in enumerate(lines) if "Card" in line)
         assert card_line > badge_line
 
+    def test_ambiguous_tag_warns(self, tmp_path):
+        comp = tmp_path / "c"
+        (comp / "lorem-ipsum").mkdir(parents=True)
+        (comp / "lorem_ipsum").mkdir()
+        (comp / "lorem-ipsum" / "Bar.jinja").write_text("")
+        (comp / "lorem_ipsum" / "Bar.jinja").write_text("")
+        reg = ComponentRegistry()
+        reg.add_folder(CatalogFolder(path=comp, prefix=""))
+        source = "<LoremIpsum.Bar />"
+        result, warnings = generate_imports_and_rename(
+            source, tmp_path / "Page.jinja", reg
+        )
+        assert result == source
+        assert len(warnings) == 1
+        assert "Ambiguous" in warnings[0]
+
 
 class TestNestedKebabCaseComponents:
     """Test migration of components nested in kebab-case folders.
@@ -127,6 +127,22 @@ class TestFindSlotBlocks:
         blocks = find_slot_blocks(source)
         assert len(blocks) == 1
 
+    def test_unterminated_block_skipped(self):
+        source = '{% if _slot == "header" %}H{% if x %}X{% endif %}'
+        blocks = find_slot_blocks(source)
+        assert len(blocks) == 0
+
+    def test_blocks_in_source_order(self):
+        source = (
+            '{% if _slot == "a" %}'
+            '{% if _slot == "b" %}B{% endif %}'
+            '{% endif %}'
+            '{% if _slot == "c" %}C{% endif %}'
+        )
+        blocks = find_slot_blocks(source)
+        assert [b.branches[0].name for b in blocks] == ["a", "b", "c"]
+        assert blocks[0].start < blocks[1].start < blocks[2].start
+
 
 class TestMigrateSlotUsage:
     def test_simple_if_else(self):
@@ -0,0 +1,73 @@
+import io
+
+from migrate import (
+    JOURNAL_NAME,
+    CatalogFolder,
+    Journal,
+    PhaseProfile,
+    add_phase_hook,
+    remove_phase_hook,
+    timed_phase,
+    transform_files,
+)
+
+
+class TestPhaseHooks:
+    def test_timed_phase_reports_to_hooks(self):
+        events = []
+
+        def hook(*event):
+            events.append(event)
+
+        add_phase_hook(hook)
+        try:
+            with timed_phase("1"):
+                pass
+        finally:
+            remove_phase_hook(hook)
+        with timed_phase("2"):
+            pass
+        assert [(name, path) for name, _, path in events] == [("1", None)]
+
+    def test_transform_and_write_phases(self, tmp_components, registry, tmp_path):
+        registry.add_folder(CatalogFolder(path=tmp_components, prefix=""))
+        profile = PhaseProfile()
+        add_phase_hook(profile)
+        try:
+            changes = list(
+                transform_files(registry.templates, registry, "/static/", jobs=2)
+            )
+            journal = Journal.start(tmp_path / JOURNAL_NAME)
+            journal.apply_templates(changes, threads=2)
+            journal.commit()
+            journal.close()
+        finally:
+            remove_phase_hook(profile)
+
+        count = len(registry.templates)
+        assert list(profile.calls) == [
+            "read", "3a/3c/3e", "3b", "3d", "3f", "3g",
+        ]
+        assert all(calls == count for calls in profile.calls.values())
+        assert set(profile.per_file) == set(registry.templates)
+        assert changes[0].timings.keys() == {"read", "3a/3c/3e", "3b", "3d", "3f"}
+
+
+class TestPhaseProfile:
+    def test_slowest_and_summary(self, tmp_path):
+        a, b, c = tmp_path / "a.jinja", tmp_path / "b.jinja", tmp_path / "c.jinja"
+        profile = PhaseProfile()
+        profile("1", 0.5, None)
+        profile("3b", 0.1, a)
+        profile("3b", 0.3, b)
+        profile("3g", 0.05, a)
+        profile("3g", 0.2, c)
+        assert profile.calls == {"1": 1, "3b": 2, "3g": 2}
+        assert profile.slowest(2) == [(b, 0.3), (c, 0.2)]
+
+        out = io.StringIO()
+        profile.print_summary(1, out)
+        text = out.getvalue()
+        assert "3b" in text and "0.4000" in text
+        assert "Slowest 1 template(s)" in text
+        assert str(b) in text and str(c) not in text
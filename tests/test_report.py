@@ -0,0 +1,144 @@
+import difflib
+import io
+import json
+
+from migrate import (
+    CatalogFolder,
+    FileChanges,
+    JsonlReport,
+    MigrationResult,
+    diff_opcodes,
+    print_diff_summary,
+    print_report,
+    transform_file,
+    unified_diff,
+)
+
+
+def apply_opcodes(a, b, opcodes):
+    out = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            out.extend(a[i1:i2])
+        else:
+            out.extend(b[j1:j2])
+    return out
+
+
+class TestDiffOpcodes:
+    def test_identical(self):
+        assert diff_opcodes(["a", "b"], ["a", "b"]) == [("equal", 0, 2, 0, 2)]
+
+    def test_empty(self):
+        assert diff_opcodes([], []) == []
+        assert diff_opcodes([], ["a"]) == [("insert", 0, 0, 0, 1)]
+
+    def test_repeated_lines(self):
+        a = ["<div>", "<div>", "<Card />", "<div>"]
+        b = ["<div>", "<div>", "<Card />", "<div>", "<div>"]
+        assert diff_opcodes(a, b) == [
+            ("equal", 0, 4, 0, 4),
+            ("insert", 4, 4, 4, 5),
+        ]
+
+    def test_rebuilds_new_lines(self):
+        a = [f"line {i}" for i in range(50)] + ["x"] * 10
+        b = ["header"] + [
+            line.replace("5", "five") for line in a
+        ] + ["x"] * 3
+        assert apply_opcodes(a, b, diff_opcodes(a, b)) == b
+
+    def test_header_and_in_place_edits_on_repetitive_lines(self):
+        a = [f"<p>{i % 3}</p>" for i in range(3000)]
+        b = list(a)
+        b[1500] = "<Form />"
+        b.insert(0, '{#import "form.jx" as Form #}')
+        opcodes = diff_opcodes(a, b)
+        assert apply_opcodes(a, b, opcodes) == b
+        changed = [op for op in opcodes if op[0] != "equal"]
+        assert len(changed) == 2
+
+
+class TestUnifiedDiff:
+    def test_matches_difflib(self):
+        a = ["a", "b", "c", "d", "e", "f", "g", "h", "i", "j"]
+        b = ["x", "a", "b", "C", "d", "e", "f", "g", "h", "i", "j", "y"]
+        for context in (0, 1, 3):
+            expected = list(difflib.unified_diff(a, b, n=context, lineterm=""))[2:]
+            assert list(unified_diff(a, b, context)) == expected
+
+    def test_no_changes(self):
+        assert list(unified_diff(["a"], ["a"])) == []
+
+
+class TestPrintDiffSummary:
+    def test_repeated_line_changes_shown(self, capsys, tmp_path):
+        changes = FileChanges(
+            file_path=tmp_path / "Page.jinja",
+            original="<br>\n<common.Form />\n<br>\n<common.Form />\n",
+            transformed="<br>\n<Form />\n<br>\n<Form />\n",
+        )
+        print_diff_summary(changes)
+        out = capsys.readouterr().out
+        assert out.count("-<common.Form />") == 2
+        assert out.count("+<Form />") == 2
+
+    def test_line_cap(self, capsys, tmp_path):
+        changes = FileChanges(
+            file_path=tmp_path / "Page.jinja",
+            original="".join(f"<a.B{i} />\n" for i in range(100)),
+            transformed="".join(f"<B{i} />\n" for i in range(100)),
+        )
+        print_diff_summary(changes, max_lines=10)
+        out = capsys.readouterr().out
+        assert out.count("\n    ") == 11
+        assert "191 more diff line(s) not shown" in out
+
+
+class TestPrintReport:
+    def test_lists_assets_by_action(self, capsys, tmp_path):
+        copied = (tmp_path / "Card.css", tmp_path / "static/Card.css")
+        replaced = (tmp_path / "Button.css", tmp_path / "static/Button.css")
+        kept = (tmp_path / "Alert.css", tmp_path / "static/Alert.css")
+        result = MigrationResult(
+            asset_copies=[copied, replaced],
+            asset_conflicts=[replaced],
+            asset_unchanged=[kept],
+        )
+        print_report(result)
+        out = capsys.readouterr().out
+        assert "Assets to copy: 2" in out
+        assert f"{replaced[0]} -> {replaced[1]}  (replaces a different file)" in out
+        assert f"{copied[0]} -> {copied[1]}\n" in out
+        assert f"Assets already up to date: 1\n    {kept[0]} -> {kept[1]}\n" in out
+
+
+class TestJsonlReport:
+    def test_file_and_summary_records(self, tmp_components, registry):
+        page = tmp_components / "Page.jinja"
+        page.write_text('<Card />{% if _slot == "a" %}A{% endif %}\n')
+        registry.add_folder(CatalogFolder(path=tmp_components, prefix=""))
+        stream = io.StringIO()
+        report = JsonlReport(stream)
+        result = MigrationResult()
+        for path in (page, tmp_components / "Badge.jinja"):
+            changes = transform_file(path, registry, "/static/")
+            report.file(changes)
+            result.add(changes, keep=False)
+        report.summary(result)
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [r["type"] for r in records] == ["file", "file", "summary"]
+        first = records[0]
+        assert first["path"] == str(page)
+        assert first["changed"] is True
+        assert first["imports_added"] == 1
+        assert first["fills_migrated"] == 1
+        assert first["warnings"] == []
+        assert first["seconds"] >= 0
+        assert records[1]["changed"] is False
+        summary = records[2]
+        assert summary["templates"] == 2
+        assert summary["templates_modified"] == 1
+        assert summary["imports_added"] == 1
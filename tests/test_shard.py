@@ -0,0 +1,87 @@
+import argparse
+import io
+import shutil
+
+import pytest
+
+from migrate import (
+    CatalogFolder,
+    JsonlReport,
+    MigrationResult,
+    merge_reports,
+    parse_shard,
+    select_shard,
+    transform_files,
+)
+
+
+class TestParseShard:
+    def test_valid(self):
+        assert parse_shard("2/5") == (2, 5)
+
+    @pytest.mark.parametrize("value", ["0/3", "4/3", "1", "a/b", "1/0"])
+    def test_invalid(self, value):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(value)
+
+
+class TestSelectShard:
+    def test_partition(self, registry, tmp_components, tmp_prefixed):
+        folders = [
+            CatalogFolder(path=tmp_components, prefix=""),
+            CatalogFolder(path=tmp_prefixed, prefix="ui"),
+        ]
+        shards = [select_shard(registry.templates, folders, i, 3) for i in (1, 2, 3)]
+        merged = sorted(path for shard in shards for path in shard)
+        assert merged == sorted(registry.templates)
+        assert len(set(merged)) == len(merged)
+
+    def test_same_split_wherever_the_checkout_is(self, tmp_components, tmp_path):
+        copy = shutil.copytree(tmp_components, tmp_path / "elsewhere" / "components")
+        splits = []
+        for root in (tmp_components, copy):
+            templates = sorted(root.rglob("*.jinja"))
+            folders = [CatalogFolder(path=root, prefix="")]
+            splits.append([
+                [p.relative_to(root) for p in select_shard(templates, folders, i, 2)]
+                for i in (1, 2)
+            ])
+        assert splits[0] == splits[1]
+
+
+class TestMergeReports:
+    def write_report(self, path, registry, files, with_assets):
+        result = MigrationResult()
+        if with_assets:
+            result.asset_copies = [(path.parent / "a.css", path.parent / "s/a.css")]
+            result.asset_conflicts = list(result.asset_copies)
+            result.asset_unchanged = [(path.parent / "b.css", path.parent / "s/b.css")]
+        out = io.StringIO()
+        report = JsonlReport(out)
+        for changes in transform_files(files, registry, "/static/"):
+            report.file(changes)
+            result.add(changes)
+        report.assets(result)
+        report.summary(result)
+        path.write_text(out.getvalue())
+        return result
+
+    def test_merge_matches_single_run(self, registry, tmp_path):
+        files = sorted(registry.templates)
+        whole = self.write_report(tmp_path / "all.jsonl", registry, files, True)
+        self.write_report(tmp_path / "1.jsonl", registry, files[:2], True)
+        self.write_report(tmp_path / "2.jsonl", registry, files[2:], False)
+
+        merged, seconds = merge_reports([tmp_path / "1.jsonl", tmp_path / "2.jsonl"])
+        assert seconds >= 0
+        assert [s.file_path for s in merged.summaries] == files
+        assert merged.stats == whole.stats
+        assert merged.templates_modified == whole.templates_modified
+        assert merged.asset_copies == whole.asset_copies
+        assert merged.asset_conflicts == whole.asset_conflicts
+        assert merged.asset_unchanged == whole.asset_unchanged
+
+    def test_overlapping_reports(self, registry, tmp_path):
+        self.write_report(tmp_path / "1.jsonl", registry, registry.templates, False)
+        with pytest.raises(ValueError, match="more than one report"):
+            merge_reports([tmp_path / "1.jsonl", tmp_path / "1.jsonl"])
@@ -0,0 +1,101 @@
+import shutil
+import subprocess
+
+import pytest
+
+from migrate import (
+    CatalogFolder,
+    ComponentRegistry,
+    UsageGraph,
+    git_changed_files,
+    templates_changed_since,
+    transform_file,
+)
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+def git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_components):
+    (tmp_components / "Page.jinja").write_text("<Card />\n")
+    (tmp_components / "Other.jinja").write_text("<Badge />\n")
+    git(tmp_components, "init", "-q")
+    git(tmp_components, "add", ".")
+    git(tmp_components, "commit", "-q", "-m", "base")
+    return tmp_components.resolve()
+
+
+def build(repo):
+    folders = [CatalogFolder(path=repo, prefix="")]
+    registry = ComponentRegistry()
+    registry.add_folder(folders[0])
+    graph = UsageGraph()
+    for path in registry.templates:
+        changes = transform_file(path, registry, "/")
+        graph.update(path, changes.uses, changes.unresolved)
+    return folders, registry, graph
+
+
+class TestGitChangedFiles:
+    def test_statuses(self, repo):
+        (repo / "Page.jinja").write_text("<Badge />\n")
+        (repo / "Badge.css").write_text(".badge {}")
+        (repo / "Other.jinja").unlink()
+        assert git_changed_files("HEAD", repo) == {
+            repo / "Page.jinja": "M",
+            repo / "Badge.css": "A",
+            repo / "Other.jinja": "D",
+        }
+
+    def test_bad_revision(self, repo):
+        with pytest.raises(ValueError):
+            git_changed_files("no-such-rev", repo)
+
+
+class TestTemplatesChangedSince:
+    def test_changed_template_only(self, repo):
+        (repo / "Card.jinja").write_text("<div>changed</div>\n")
+        folders, registry, graph = build(repo)
+        changed = git_changed_files("HEAD", repo)
+        assert templates_changed_since(changed, folders, registry, graph) == {
+            repo / "Card.jinja"
+        }
+
+    def test_removed_component_and_new_asset(self, repo):
+        folders, registry, graph = build(repo)
+        (repo / "Card.jinja").unlink()
+        (repo / "Card.css").unlink()
+        (repo / "Badge.css").write_text(".badge {}")
+        registry = ComponentRegistry()
+        registry.add_folder(folders[0])
+        changed = git_changed_files("HEAD", repo)
+        assert templates_changed_since(changed, folders, registry, graph) == {
+            repo / "Page.jinja",
+            repo / "Badge.jinja",
+        }
+
+    def test_added_component(self, repo):
+        (repo / "Page.jinja").write_text("<Card />\n<Foo />\n")
+        git(repo, "commit", "-q", "-am", "use Foo")
+        folders, _, graph = build(repo)
+        (repo / "Foo.jinja").write_text("<p>foo</p>\n")
+        registry = ComponentRegistry()
+        registry.add_folder(folders[0])
+        changed = git_changed_files("HEAD", repo)
+        assert templates_changed_since(changed, folders, registry, graph) == {
+            repo / "Foo.jinja",
+            repo / "Page.jinja",
+        }
+
+    def test_without_graph(self, repo):
+        folders, registry, _ = build(repo)
+        (repo / "Card.jinja").unlink()
+        changed = git_changed_files("HEAD", repo)
+        assert templates_changed_since(changed, folders, registry, None) == set()
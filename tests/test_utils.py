@@ -1,6 +1,7 @@
 from migrate import (
     to_pascal_case,
     kebab_case,
+    lex_template,
     protect_raw_blocks,
     restore_raw_blocks,
 )
@@ -65,3 +66,25 @@ class TestRawBlockProtection:
         assert "<Card />" not in protected
         restored = restore_raw_blocks(protected, placeholders)
         assert restored == source
+
+
+class TestLexTemplate:
+    def test_segment_kinds(self):
+        source = '{#def x #}\n<div>{% if x %}{{ x }}{% endif %}</div>'
+        kinds = [s.kind for s in lex_template(source)]
+        assert kinds == [
+            "comment", "text", "statement", "expression", "statement", "text"
+        ]
+
+    def test_raw_block_is_one_segment(self):
+        source = "a{% raw %}{{ x }}{% if %}{% endraw %}b"
+        segments = lex_template(source)
+        assert [s.kind for s in segments] == ["text", "raw", "text"]
+        assert segments[1].text == "{% raw %}{{ x }}{% if %}{% endraw %}"
+
+    def test_round_trip(self):
+        source = '{#css a.css #}\n{% raw %}<A/>{% endraw %}{{ a }}{% b %}{# x'
+        assert "".join(s.text for s in lex_template(source)) == source
+
+    def test_empty(self):
+        assert lex_template("") == []
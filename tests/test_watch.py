@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from migrate import CatalogFolder, ComponentRegistry, Watcher
+
+
+def touch(path, text):
+    """Write a file and make sure its mtime moves forward."""
+    mtime = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(text)
+    stat = path.stat()
+    if stat.st_mtime_ns <= mtime:
+        os.utime(path, ns=(stat.st_atime_ns, mtime + 1))
+
+
+@pytest.fixture
+def watcher(tmp_components):
+    (tmp_components / "Page.jinja").write_text("<Card />\n")
+    folders = [CatalogFolder(path=tmp_components.resolve(), prefix="")]
+    registry = ComponentRegistry()
+    registry.add_folder(folders[0])
+    watcher = Watcher(folders, registry, "/static/")
+    watcher.prime()
+    return watcher
+
+
+def names(results):
+    return sorted(changes.file_path.name for changes in results)
+
+
+class TestWatcher:
+    def test_no_changes(self, watcher):
+        assert watcher.poll() == ([], [])
+
+    def test_modified_template(self, watcher, tmp_components):
+        touch(tmp_components / "Page.jinja", "<Badge />\n")
+        results, deleted = watcher.poll()
+        assert names(results) == ["Page.jinja"] and deleted == []
+        assert '{#import "Badge.jx" as Badge #}' in results[0].transformed
+        assert watcher.graph.dependents_of("Badge") == [results[0].file_path]
+        assert watcher.poll() == ([], [])
+
+    def test_deleted_component_updates_dependents(self, watcher, tmp_components):
+        card = (tmp_components / "Card.jinja").resolve()
+        card.unlink()
+        results, deleted = watcher.poll()
+        assert deleted == [card]
+        assert names(results) == ["Page.jinja"]
+        assert "import" not in results[0].transformed
+        assert "Card" not in watcher.registry.components
+
+    def test_new_asset_updates_component(self, watcher, tmp_components):
+        touch(tmp_components / "Badge.css", ".badge {}")
+        results, _ = watcher.poll()
+        assert names(results) == ["Badge.jinja"]
+        assert "{#css /static/Badge.css #}" in results[0].transformed
+
+    def test_new_component_updates_templates_using_it(self, watcher, tmp_components):
+        touch(tmp_components / "Page.jinja", "<Card />\n<Foo />\n")
+        watcher.poll()
+        touch(tmp_components / "Foo.jinja", "<p>foo</p>\n")
+        results, _ = watcher.poll()
+        assert names(results) == ["Foo.jinja", "Page.jinja"]
+        assert '{#import "Foo.jx" as Foo #}' in results[1].transformed
+        assert watcher.graph.dependents_of("Foo") == [results[1].file_path]
+
+    def test_new_template(self, watcher, tmp_components):
+        touch(tmp_components / "Other.jinja", "<Card />\n")
+        results, _ = watcher.poll()
+        assert names(results) == ["Other.jinja"]
+        assert "Other" in watcher.registry.components